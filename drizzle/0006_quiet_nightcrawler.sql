@@ -0,0 +1 @@
+ALTER TABLE `scans` ADD `telemetry` json;
\ No newline at end of file
@@ -0,0 +1,18 @@
+CREATE TABLE `scanResults` (
+	`id` int AUTO_INCREMENT NOT NULL,
+	`resultKey` varchar(64) NOT NULL,
+	`scanType` enum('http_smuggling','ssrf','xss','subdomain_enum','comprehensive') NOT NULL,
+	`target` varchar(512) NOT NULL,
+	`moduleVersion` varchar(64) NOT NULL,
+	`sourceScanId` int NOT NULL,
+	`vulnerabilities` json NOT NULL,
+	`report` json,
+	`duration` int,
+	`completedAt` timestamp NOT NULL,
+	CONSTRAINT `scanResults_id` PRIMARY KEY(`id`),
+	CONSTRAINT `scanResults_resultKey_unique` UNIQUE(`resultKey`)
+);
+--> statement-breakpoint
+ALTER TABLE `scans` ADD `moduleVersion` varchar(64);--> statement-breakpoint
+ALTER TABLE `scans` ADD `resultKey` varchar(64);--> statement-breakpoint
+ALTER TABLE `scans` ADD `reusedFromScanId` int;
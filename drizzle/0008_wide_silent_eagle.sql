@@ -0,0 +1,6 @@
+ALTER TABLE `scans` ADD `priority` enum('low','normal','high') NOT NULL DEFAULT 'normal';--> statement-breakpoint
+CREATE INDEX `scans_status_user_priority_idx` ON `scans` (`status`,`userId`,`priority`);--> statement-breakpoint
+CREATE INDEX `scans_worker_picked_at_idx` ON `scans` (`workerPickedAt`);--> statement-breakpoint
+CREATE INDEX `scans_result_key_status_idx` ON `scans` (`resultKey`,`status`);--> statement-breakpoint
+CREATE INDEX `scans_status_type_target_idx` ON `scans` (`status`,`scanType`,`target`);--> statement-breakpoint
+CREATE INDEX `scans_reused_from_idx` ON `scans` (`reusedFromScanId`);
@@ -0,0 +1,2 @@
+DROP INDEX `scans_status_user_priority_idx` ON `scans`;--> statement-breakpoint
+CREATE INDEX `scans_status_user_priority_type_idx` ON `scans` (`status`,`userId`,`priority`,`scanType`);
\ No newline at end of file
@@ -0,0 +1,2 @@
+ALTER TABLE `scans` ADD `targetKey` varchar(64);--> statement-breakpoint
+CREATE INDEX `scans_status_type_target_key_idx` ON `scans` (`status`,`scanType`,`targetKey`);
\ No newline at end of file
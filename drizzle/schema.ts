@@ -1,4 +1,4 @@
-import { int, mysqlEnum, mysqlTable, text, timestamp, varchar, json, bigint } from "drizzle-orm/mysql-core";
+import { int, mysqlEnum, mysqlTable, text, timestamp, varchar, json, bigint, index } from "drizzle-orm/mysql-core";
 
 /**
  * Core user table backing auth flow.
@@ -18,6 +18,53 @@ export const users = mysqlTable("users", {
 export type User = typeof users.$inferSelect;
 export type InsertUser = typeof users.$inferInsert;
 
+/**
+ * Per-job performance telemetry. `scanner` is what the scan script measured
+ * (traffic, DNS, retries, latency percentiles, phase times, peak RSS),
+ * `worker` is the worker client's own timing and `backend` is added when
+ * the results are stored.
+ */
+export type ScanTelemetry = {
+  scanner?: {
+    requests: number;
+    errors: number;
+    retries: number;
+    bytes_read: number;
+    bytes_sent: number;
+    avg_latency: number;
+    p50_latency: number;
+    p95_latency: number;
+    status: Record<string, number>;
+    dns_queries: number;
+    dns_cache_hits: number;
+    response_cache_hits?: number; // baseline GETs served by the cross-scan response cache
+    phases: Record<string, number>; // seconds, may overlap
+    peak_rss_mb: number | null;
+  } | null;
+  profile?: {
+    pstats: string; // cProfile output, on the worker's disk
+    collapsed: string; // sampled stacks for flamegraph tools
+    seconds: number;
+    samples: number;
+  } | null;
+  worker?: {
+    workerId: string;
+    phases: Record<string, number>; // seconds
+    logPosts: number;
+    logFailures: number;
+    stdoutBytes: number;
+    payloadBytes: number;
+    peakRssMb: number | null;
+    sentAt: number; // epoch ms, worker clock
+  };
+  backend?: {
+    receivedAt: string;
+    queueMs: number | null; // created -> picked up by a worker
+    uploadMs: number | null; // worker sentAt -> received; skewed by clock drift
+    storeMs: number;
+  };
+};
+
 /**
  * Scans table - stores metadata about security scans
  */
@@ -28,13 +75,27 @@ export const scans = mysqlTable("scans", {
   target: varchar("target", { length: 512 }).notNull(),
   scope: text("scope"),
   status: mysqlEnum("status", ["pending", "running", "completed", "failed"]).default("pending").notNull(),
+  priority: mysqlEnum("priority", ["low", "normal", "high"]).default("normal").notNull(), // see server/scanScheduler.ts
   workerId: varchar("workerId", { length: 128 }), // ID do worker que pegou o job
   workerPickedAt: timestamp("workerPickedAt"), // Quando o worker pegou o job
   startedAt: timestamp("startedAt").defaultNow().notNull(),
   completedAt: timestamp("completedAt"),
   duration: int("duration"), // in seconds
+  telemetry: json("telemetry").$type<ScanTelemetry>(),
+  moduleVersion: varchar("moduleVersion", { length: 64 }), // scanner modules of the worker that ran it
+  resultKey: varchar("resultKey", { length: 64 }), // see scanResults
+  targetKey: varchar("targetKey", { length: 64 }), // hash of the normalized target, to find queued duplicates
+  reusedFromScanId: int("reusedFromScanId"), // result copied from (or shared with) this scan instead of running
   createdAt: timestamp("createdAt").defaultNow().notNull(),
-});
+}, (table) => [
+  // Dispatch: queue heads per user, priority and type, recent usage, duplicate lookups
+  index("scans_status_user_priority_type_idx").on(table.status, table.userId, table.priority, table.scanType),
+  index("scans_worker_picked_at_idx").on(table.workerPickedAt),
+  index("scans_result_key_status_idx").on(table.resultKey, table.status),
+  index("scans_status_type_target_idx").on(table.status, table.scanType, table.target),
+  index("scans_status_type_target_key_idx").on(table.status, table.scanType, table.targetKey),
+  index("scans_reused_from_idx").on(table.reusedFromScanId),
+]);
 
 export type Scan = typeof scans.$inferSelect;
 export type InsertScan = typeof scans.$inferInsert;
@@ -92,3 +153,25 @@ export const scanLogs = mysqlTable("scanLogs", {
 
 export type ScanLog = typeof scanLogs.$inferSelect;
 export type InsertScanLog = typeof scanLogs.$inferInsert;
+
+/**
+ * Scan Results table - content-addressed store of completed scan results.
+ * resultKey hashes scan type, normalized target and scanner module version
+ * (server/scanDedup.ts); an identical scan queued within the reuse window
+ * gets a copy of this result instead of being dispatched.
+ */
+export const scanResults = mysqlTable("scanResults", {
+  id: int("id").autoincrement().primaryKey(),
+  resultKey: varchar("resultKey", { length: 64 }).notNull().unique(),
+  scanType: mysqlEnum("scanType", ["http_smuggling", "ssrf", "xss", "subdomain_enum", "comprehensive"]).notNull(),
+  target: varchar("target", { length: 512 }).notNull(), // normalized
+  moduleVersion: varchar("moduleVersion", { length: 64 }).notNull(),
+  sourceScanId: int("sourceScanId").notNull(),
+  vulnerabilities: json("vulnerabilities").$type<Omit<InsertVulnerability, "id" | "scanId" | "createdAt">[]>().notNull(),
+  report: json("report").$type<{ content: string; summary: InsertReport["summary"] } | null>(),
+  duration: int("duration"), // in seconds, of the source scan
+  completedAt: timestamp("completedAt").notNull(),
+});
+
+export type ScanResult = typeof scanResults.$inferSelect;
+export type InsertScanResult = typeof scanResults.$inferInsert;
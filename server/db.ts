@@ -1,7 +1,8 @@
-import { eq, desc } from "drizzle-orm";
+import { and, eq, desc, gte, inArray, isNull, or, sql } from "drizzle-orm";
 import { drizzle } from "drizzle-orm/mysql2";
-import { InsertUser, users, scans, InsertScan, Scan, vulnerabilities, InsertVulnerability, Vulnerability, reports, InsertReport, Report, scanLogs, InsertScanLog, ScanLog } from "../drizzle/schema";
+import { InsertUser, users, scans, InsertScan, Scan, vulnerabilities, InsertVulnerability, Vulnerability, reports, InsertReport, Report, scanLogs, InsertScanLog, ScanLog, scanResults, InsertScanResult, ScanResult } from "../drizzle/schema";
 import { ENV } from './_core/env';
+import { targetKey } from "./scanDedup";
 
 let _db: ReturnType<typeof drizzle> | null = null;
 
@@ -94,7 +95,7 @@ export async function createScan(scan: InsertScan): Promise<number> {
   const db = await getDb();
   if (!db) throw new Error("Database not available");
 
-  const result = await db.insert(scans).values(scan);
+  const result = await db.insert(scans).values({ ...scan, targetKey: scan.targetKey ?? targetKey(scan.target) });
   return Number(result[0].insertId);
 }
 
@@ -139,6 +140,91 @@ export async function updateScan(id: number, updates: Partial<InsertScan>): Prom
   await db.update(scans).set(updates).where(eq(scans.id, id));
 }
 
+// ============ DISPATCH ============
+
+/**
+ * Oldest pending scan of each (user, priority, scan type) among `scanTypes`,
+ * the types the polling worker can run: one row per queue rather than every
+ * pending scan. MIN(id) is the oldest since ids follow insertion order, and
+ * the (status, userId, priority, scanType) index answers the grouping.
+ */
+export async function getPendingScanHeads(scanTypes: Scan["scanType"][]): Promise<Scan[]> {
+  const db = await getDb();
+  if (!db || scanTypes.length === 0) return [];
+
+  const heads = await db
+    .select({ id: sql<number>`min(${scans.id})` })
+    .from(scans)
+    .where(and(eq(scans.status, "pending"), inArray(scans.scanType, scanTypes)))
+    .groupBy(scans.userId, scans.priority, scans.scanType);
+  if (heads.length === 0) return [];
+
+  return await db.select().from(scans).where(inArray(scans.id, heads.map(head => Number(head.id))));
+}
+
+/** Scans a worker picked up since `since` (coalesced and reused ones took no worker time) */
+export async function getScansDispatchedSince(since: Date): Promise<Pick<Scan, "userId" | "scanType" | "workerPickedAt">[]> {
+  const db = await getDb();
+  if (!db) return [];
+
+  return await db
+    .select({ userId: scans.userId, scanType: scans.scanType, workerPickedAt: scans.workerPickedAt })
+    .from(scans)
+    .where(and(gte(scans.workerPickedAt, since), isNull(scans.reusedFromScanId)));
+}
+
+/**
+ * Moves a scan from pending to running with `updates`. False when another
+ * worker's poll claimed it first.
+ */
+export async function claimPendingScan(id: number, updates: Partial<InsertScan>): Promise<boolean> {
+  const db = await getDb();
+  if (!db) throw new Error("Database not available");
+
+  const result = await db
+    .update(scans)
+    .set({ ...updates, status: "running" })
+    .where(and(eq(scans.id, id), eq(scans.status, "pending")));
+  return result[0].affectedRows > 0;
+}
+
+export async function getRunningScanByResultKey(resultKey: string): Promise<Scan | undefined> {
+  const db = await getDb();
+  if (!db) return undefined;
+
+  const result = await db
+    .select()
+    .from(scans)
+    .where(and(eq(scans.resultKey, resultKey), eq(scans.status, "running"), isNull(scans.reusedFromScanId)))
+    .limit(1);
+  return result[0];
+}
+
+/**
+ * Pending scans of `scanType` whose target normalizes to the same form as
+ * `target` (and, for rows queued before targetKey existed, the same string)
+ */
+export async function getPendingScansForTarget(scanType: Scan["scanType"], target: string): Promise<Scan[]> {
+  const db = await getDb();
+  if (!db) return [];
+
+  return await db
+    .select()
+    .from(scans)
+    .where(and(
+      eq(scans.status, "pending"),
+      eq(scans.scanType, scanType),
+      or(eq(scans.targetKey, targetKey(target)), and(isNull(scans.targetKey), eq(scans.target, target)))
+    ));
+}
+
+export async function getScansReusing(scanId: number): Promise<Scan[]> {
+  const db = await getDb();
+  if (!db) return [];
+
+  return await db.select().from(scans).where(eq(scans.reusedFromScanId, scanId));
+}
+
 // ============ VULNERABILITIES ============
 
 export async function createVulnerability(vuln: InsertVulnerability): Promise<number> {
@@ -189,3 +275,25 @@ export async function getScanLogsByScanId(scanId: number): Promise<ScanLog[]> {
 
   return await db.select().from(scanLogs).where(eq(scanLogs.scanId, scanId)).orderBy(scanLogs.timestamp);
 }
+
+// ============ SCAN RESULTS ============
+
+export async function getFreshScanResult(resultKey: string, since: Date): Promise<ScanResult | undefined> {
+  const db = await getDb();
+  if (!db) return undefined;
+
+  const result = await db
+    .select()
+    .from(scanResults)
+    .where(and(eq(scanResults.resultKey, resultKey), gte(scanResults.completedAt, since)))
+    .limit(1);
+  return result[0];
+}
+
+export async function upsertScanResult(result: InsertScanResult): Promise<void> {
+  const db = await getDb();
+  if (!db) throw new Error("Database not available");
+
+  const { resultKey, ...rest } = result;
+  await db.insert(scanResults).values(result).onDuplicateKeyUpdate({ set: rest });
+}
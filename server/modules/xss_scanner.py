@@ -6,22 +6,28 @@ Based on advanced XSS techniques and Google's $250k bug research
 
 import sys
 import json
-import requests
 import urllib.parse
 from bs4 import BeautifulSoup
+from scan_output import NDJSONWriter, ndjson_requested
+from scan_profiler import profiling
+from scanner_runtime import fetch, fetch_baseline, metrics, read_body
 import warnings
 warnings.filterwarnings('ignore', message='Unverified HTTPS request')
 
+# Upper bound on how much of a page is buffered for reflection/sink checks
+MAX_BODY_BYTES = 512 * 1024
+
 class XSSScanner:
     def __init__(self, target, verbose=False):
         self.target = target
         self.verbose = verbose
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        })
         self.vulnerabilities = []
+        self.on_finding = None  # called with each finding as it is confirmed
+    
+    def add_vulnerability(self, vuln):
+        self.vulnerabilities.append(vuln)
+        if self.on_finding:
+            self.on_finding(vuln)
     
     def log(self, message):
         """Print verbose logs to stderr"""
@@ -76,13 +82,15 @@ class XSSScanner:
                 self.log(f"  → Testing payload: {payload_obj['payload'][:50]}...")
                 
                 try:
-                    response = self.session.get(test_url, timeout=10, verify=False)
-                    self.log(f"    Response: {response.status_code} ({len(response.text)} bytes)")
+                    response = fetch(test_url, timeout=10)
+                    body = read_body(response, MAX_BODY_BYTES).lower()
+                    self.log(f"    Response: {response.status_code} ({len(body)} bytes)")
                     
-                    if payload_obj['payload'] in response.text or \
-                       payload_obj['payload'].replace('<', '&lt;').replace('>', '&gt;') in response.text:
+                    payload = payload_obj['payload'].lower()
+                    if payload in body or \
+                       payload.replace('<', '&lt;').replace('>', '&gt;') in body:
                         self.log(f"    ✓ VULNERABILITY FOUND!")
-                        self.vulnerabilities.append({
+                        self.add_vulnerability({
                             'type': 'Reflected XSS',
                             'severity': payload_obj['severity'],
                             'parameter': param,
@@ -102,7 +110,7 @@ class XSSScanner:
         print(f"[*] Testing DOM-based XSS on {self.target}", file=sys.stderr)
         
         try:
-            response = self.session.get(self.target, timeout=10, verify=False)
+            response = fetch_baseline(self.target, MAX_BODY_BYTES, timeout=10)
             soup = BeautifulSoup(response.text, 'html.parser')
             
             # Look for dangerous JavaScript patterns
@@ -118,7 +126,7 @@ class XSSScanner:
                     script_content = script.string.lower()
                     for pattern in dangerous_patterns:
                         if pattern.lower() in script_content:
-                            self.vulnerabilities.append({
+                            self.add_vulnerability({
                                 'type': 'Potential DOM-based XSS',
                                 'severity': 'medium',
                                 'sink': pattern,
@@ -150,11 +158,12 @@ class XSSScanner:
                 test_url = f"{base_url}?{param}={urllib.parse.quote(payload_obj['payload'])}"
                 
                 try:
-                    response = self.session.get(test_url, timeout=10, verify=False)
+                    response = fetch(test_url, timeout=10)
+                    body = read_body(response, MAX_BODY_BYTES).lower()
                     
                     # Check if template was executed (7*7 = 49)
-                    if payload_obj['expected'] in response.text and payload_obj['payload'] not in response.text:
-                        self.vulnerabilities.append({
+                    if payload_obj['expected'] in body and payload_obj['payload'].lower() not in body:
+                        self.add_vulnerability({
                             'type': 'Template Injection',
                             'severity': 'critical',
                             'parameter': param,
@@ -174,9 +183,12 @@ class XSSScanner:
         
         try:
             # Test different XSS types
-            self.test_reflected_xss()
-            self.test_dom_xss()
-            self.test_template_injection()
+            with metrics.phase('reflected'):
+                self.test_reflected_xss()
+            with metrics.phase('dom'):
+                self.test_dom_xss()
+            with metrics.phase('template'):
+                self.test_template_injection()
             
             # Generate summary
             summary = {
@@ -213,19 +225,34 @@ def main():
     
     target = sys.argv[1]
     verbose = '--verbose' in sys.argv or '-v' in sys.argv
+    ndjson = NDJSONWriter() if ndjson_requested() else None
     
     try:
         scanner = XSSScanner(target, verbose=verbose)
-        result = scanner.scan()
-        print(json.dumps(result, indent=2))
+        if ndjson:
+            scanner.on_finding = ndjson.finding
+        with profiling('xss') as profiler:
+            result = scanner.scan()
+        result['telemetry'] = metrics.snapshot()
+        if profiler.artifacts:
+            result['profile'] = profiler.artifacts
+        if ndjson:
+            ndjson.summary(result)
+        else:
+            print(json.dumps(result, indent=2))
         
     except Exception as e:
-        print(json.dumps({
+        result = {
             'success': False,
             'error': str(e),
             'vulnerabilities': [],
-            'summary': {'total': 0, 'critical': 0, 'high': 0, 'medium': 0, 'low': 0}
-        }))
+            'summary': {'total': 0, 'critical': 0, 'high': 0, 'medium': 0, 'low': 0},
+            'telemetry': metrics.snapshot()
+        }
+        if ndjson:
+            ndjson.summary(result)
+        else:
+            print(json.dumps(result))
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -51,13 +51,19 @@ export const appRouter = router({
         scanType: z.enum(["http_smuggling", "ssrf", "xss", "subdomain_enum", "comprehensive"]),
         target: z.string().url(),
         scope: z.string().optional(),
+        priority: z.enum(["low", "normal", "high"]).default("normal"),
       }))
       .mutation(async ({ ctx, input }) => {
+        if (input.priority === "high" && ctx.user.role !== 'admin') {
+          throw new TRPCError({ code: 'FORBIDDEN', message: 'High priority requires admin access' });
+        }
+
         const scanId = await createScan({
           userId: ctx.user.id,
           scanType: input.scanType,
           target: input.target,
           scope: input.scope,
+          priority: input.priority,
           status: "pending",
         });
 
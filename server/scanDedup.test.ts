@@ -0,0 +1,37 @@
+import { describe, expect, it } from "vitest";
+import { normalizeTarget, resultKey, targetKey, UNVERSIONED } from "./scanDedup";
+
+describe("scan dedup keys", () => {
+  it("should normalize equivalent targets to the same form", () => {
+    expect(normalizeTarget("HTTPS://Example.COM:443")).toBe("https://example.com/");
+    expect(normalizeTarget("https://example.com/#top")).toBe("https://example.com/");
+    expect(normalizeTarget("https://example.com/?b=2&a=1")).toBe(normalizeTarget("https://example.com/?a=1&b=2"));
+    expect(normalizeTarget(" Example.com ")).toBe("example.com");
+  });
+
+  it("should keep targets that differ in path, port or scheme apart", () => {
+    expect(normalizeTarget("https://example.com/a")).not.toBe(normalizeTarget("https://example.com/b"));
+    expect(normalizeTarget("https://example.com:8443/")).not.toBe(normalizeTarget("https://example.com/"));
+    expect(normalizeTarget("http://example.com/")).not.toBe(normalizeTarget("https://example.com/"));
+  });
+
+  it("should key results by scan type, target and module version", () => {
+    const key = resultKey("xss", "https://example.com", "abc123");
+
+    expect(key).toMatch(/^[0-9a-f]{64}$/);
+    expect(resultKey("xss", "HTTPS://EXAMPLE.com/", "abc123")).toBe(key);
+    expect(resultKey("ssrf", "https://example.com", "abc123")).not.toBe(key);
+    expect(resultKey("xss", "https://example.com", "def456")).not.toBe(key);
+    expect(resultKey("xss", "https://example.com", "")).toBe(resultKey("xss", "https://example.com", UNVERSIONED));
+  });
+
+  it("should give queued scans that differ only in case or a trailing slash one target key", () => {
+    const queued = ["https://Example.com/", "https://example.com", "HTTPS://EXAMPLE.COM"];
+
+    expect(new Set(queued.map(targetKey)).size).toBe(1);
+    expect(targetKey(queued[0])).toMatch(/^[0-9a-f]{64}$/);
+    // The key they are merged by agrees with the one their result is stored under
+    expect(new Set(queued.map(target => resultKey("xss", target, "abc123"))).size).toBe(1);
+    expect(targetKey("https://example.com/a")).not.toBe(targetKey("https://example.com/"));
+  });
+});
@@ -0,0 +1,44 @@
+import { createHash } from "crypto";
+
+/**
+ * How long a completed scan's result is handed to identical scans instead
+ * of running them again. SCAN_REUSE_WINDOW_MINUTES=0 turns reuse off;
+ * identical scans that are queued while one is running are still
+ * coalesced onto it.
+ */
+export const REUSE_WINDOW_MS = Number(process.env.SCAN_REUSE_WINDOW_MINUTES ?? "60") * 60_000;
+
+/** Module version for workers that do not report one */
+export const UNVERSIONED = "unversioned";
+
+/**
+ * Canonical form of a scan target: lower-case scheme and host, no default
+ * port, no fragment, "/" for an empty path and sorted query parameters.
+ * Targets that are not URLs are only trimmed and lower-cased.
+ */
+export function normalizeTarget(target: string): string {
+  let url: URL;
+  try {
+    url = new URL(target.trim());
+  } catch {
+    return target.trim().toLowerCase();
+  }
+  url.hash = "";
+  url.searchParams.sort();
+  return url.toString();
+}
+
+/** Hash of the normalized target: scans with equal keys are duplicates while queued */
+export function targetKey(target: string): string {
+  return createHash("sha256").update(normalizeTarget(target)).digest("hex");
+}
+
+/**
+ * Content address of a scan's result: the same scan type against the same
+ * normalized target with the same scanner modules gives the same key.
+ */
+export function resultKey(scanType: string, target: string, moduleVersion: string): string {
+  return createHash("sha256")
+    .update(`${scanType}\n${normalizeTarget(target)}\n${moduleVersion || UNVERSIONED}`)
+    .digest("hex");
+}
@@ -0,0 +1,163 @@
+import { describe, expect, it } from "vitest";
+import {
+  AGING_MS,
+  orderCandidates,
+  SCAN_COSTS,
+  USAGE_HALF_LIFE_MS,
+  USAGE_WINDOW_MS,
+  userUsage,
+  type DispatchedScan,
+  type QueuedScan,
+  type ScanPriority,
+  type ScanType,
+} from "./scanScheduler";
+
+const T0 = Date.UTC(2026, 0, 1);
+const MINUTE = 60_000;
+
+/**
+ * In-memory stand-in for the scans table as dispatch sees it: FIFO queues
+ * per (user, priority, type) whose heads are what getPendingScanHeads returns,
+ * and the scans dispatched so far.
+ */
+class SimulatedQueue {
+  private queues = new Map<string, QueuedScan[]>();
+  private nextId = 1;
+  dispatched: (DispatchedScan & { id: number; priority: ScanPriority })[] = [];
+  now = T0;
+
+  add(userId: number, scanType: ScanType, priority: ScanPriority = "normal", createdAt = this.now) {
+    const key = `${userId}:${priority}:${scanType}`;
+    let queue = this.queues.get(key);
+    if (!queue) {
+      queue = [];
+      this.queues.set(key, queue);
+    }
+    const scan = { id: this.nextId++, userId, scanType, priority, createdAt: new Date(createdAt) };
+    queue.push(scan);
+    return scan;
+  }
+
+  heads(): QueuedScan[] {
+    return Array.from(this.queues.values(), queue => queue[0]).filter(Boolean);
+  }
+
+  get pending() {
+    return Array.from(this.queues.values()).reduce((total, queue) => total + queue.length, 0);
+  }
+
+  /** One poll: order the heads, dispatch the first, advance the clock */
+  dispatchNext(stepMs = MINUTE / 6) {
+    const since = this.now - USAGE_WINDOW_MS;
+    const recent = this.dispatched.filter(scan => scan.workerPickedAt!.getTime() >= since);
+    const [next] = orderCandidates(this.heads(), recent, this.now);
+    if (!next) return undefined;
+    this.queues.get(`${next.userId}:${next.priority}:${next.scanType}`)!.shift();
+    this.dispatched.push({ ...next, workerPickedAt: new Date(this.now) });
+    this.now += stepMs;
+    return next;
+  }
+}
+
+describe("scan scheduler", () => {
+  it("should charge usage by cost and let it decay", () => {
+    const usage = userUsage(
+      [
+        { userId: 1, scanType: "subdomain_enum", workerPickedAt: new Date(T0) },
+        { userId: 1, scanType: "http_smuggling", workerPickedAt: new Date(T0 - USAGE_HALF_LIFE_MS) },
+        { userId: 2, scanType: "xss", workerPickedAt: new Date(T0 - USAGE_WINDOW_MS - 1) },
+        { userId: 3, scanType: "xss", workerPickedAt: null },
+      ],
+      T0
+    );
+
+    expect(usage.get(1)).toBeCloseTo(SCAN_COSTS.subdomain_enum + SCAN_COSTS.http_smuggling / 2);
+    expect(usage.has(2)).toBe(false);
+    expect(usage.has(3)).toBe(false);
+  });
+
+  it("should run cheaper scans first at equal usage and wait", () => {
+    const queue = new SimulatedQueue();
+    queue.add(1, "subdomain_enum");
+    queue.add(2, "comprehensive");
+    queue.add(3, "http_smuggling");
+
+    const order = [queue.dispatchNext(0), queue.dispatchNext(0), queue.dispatchNext(0)];
+
+    expect(order.map(scan => scan?.scanType)).toEqual(["http_smuggling", "subdomain_enum", "comprehensive"]);
+  });
+
+  it("should dispatch oldest first within a user's queue", () => {
+    const queue = new SimulatedQueue();
+    const first = queue.add(1, "xss", "normal", T0 - 2 * MINUTE);
+    const second = queue.add(1, "xss", "normal", T0 - MINUTE);
+
+    expect(queue.dispatchNext()?.id).toBe(first.id);
+    expect(queue.dispatchNext()?.id).toBe(second.id);
+  });
+
+  it("should not let a user with 100k queued scans block everyone else", () => {
+    const queue = new SimulatedQueue();
+    // An hour-old flood from one user, then one scan each from ten others
+    for (let i = 0; i < 100_000; i++) {
+      queue.add(1, "xss", "normal", T0 - 60 * MINUTE);
+    }
+    const others = new Set<number>();
+    for (let userId = 2; userId <= 11; userId++) {
+      others.add(queue.add(userId, "xss").id);
+    }
+
+    const firstTwenty = Array.from({ length: 20 }, () => queue.dispatchNext()!);
+    const served = firstTwenty.filter(scan => others.has(scan.id));
+
+    expect(served).toHaveLength(others.size);
+    // The flooding user still gets the leftover capacity
+    expect(firstTwenty.some(scan => scan.userId === 1)).toBe(true);
+    expect(queue.pending).toBe(100_000 + others.size - 20);
+  }, 60_000);
+
+  it("should share dispatch evenly across users in a 100k-scan queue", () => {
+    const queue = new SimulatedQueue();
+    const types: ScanType[] = ["http_smuggling", "ssrf", "xss", "subdomain_enum", "comprehensive"];
+    const users = 1_000;
+    for (let i = 0; i < 100_000; i++) {
+      queue.add(i % users, types[Math.floor(i / users) % types.length], "normal", T0 - (i % 120) * MINUTE);
+    }
+
+    // Worker time charged to each user, in cost units
+    const charged = new Map<number, number>();
+    const started = Date.now();
+    for (let i = 0; i < 2 * users; i++) {
+      const scan = queue.dispatchNext(1_000)!;
+      charged.set(scan.userId, (charged.get(scan.userId) ?? 0) + SCAN_COSTS[scan.scanType]);
+    }
+    const elapsed = Date.now() - started;
+
+    // Every user got a turn and nobody got more than twice the average share
+    const shares = Array.from(charged.values());
+    const average = shares.reduce((total, share) => total + share, 0) / shares.length;
+    expect(charged.size).toBe(users);
+    expect(Math.max(...shares)).toBeLessThanOrEqual(2 * average);
+    // Dispatch only looks at one head per queue, not at the 100k rows
+    expect(queue.heads().length).toBeLessThanOrEqual(users * types.length);
+    expect(elapsed).toBeLessThan(30_000);
+  }, 60_000);
+
+  it("should put high priority ahead but not starve older low priority scans", () => {
+    const queue = new SimulatedQueue();
+    const old = queue.add(1, "xss", "low");
+
+    // A new high priority scan from the same user arrives every minute
+    let dispatchedAt = -1;
+    for (let step = 0; step < 200 && dispatchedAt < 0; step++) {
+      queue.add(1, "xss", "high");
+      if (queue.dispatchNext(MINUTE)?.id === old.id) {
+        dispatchedAt = step;
+      }
+    }
+
+    expect(dispatchedAt).toBeGreaterThan(0);
+    // The low scan overtakes fresh high ones once aging makes up the 4x weight
+    expect(dispatchedAt * MINUTE).toBeLessThanOrEqual(3 * AGING_MS + 2 * MINUTE);
+  });
+});
@@ -0,0 +1,79 @@
+import type { Scan } from "../drizzle/schema";
+
+/**
+ * Dispatch order for pending scans.
+ *
+ * Each user is charged the estimated cost of every scan dispatched for
+ * them, and the charge decays with a half-life of USAGE_HALF_LIFE_MS, so a
+ * user's usage is a sliding measure of how much worker time they took
+ * recently. A pending scan scores
+ *
+ *   (owner's usage + scan cost) / (priority weight * (1 + waited / AGING_MS))
+ *
+ * and the lowest score goes first: users who have had less recently go
+ * ahead of a user with a deep queue, cheap scans go ahead of expensive
+ * ones at equal usage, priority scales the score down, and the wait term
+ * grows without bound so nothing starves. Within one user, priority and
+ * scan type scans run oldest first, which lets the queue be read as one
+ * head per (user, priority, type) instead of every pending row (see
+ * getPendingScanHeads).
+ */
+
+export type ScanType = Scan["scanType"];
+export type ScanPriority = Scan["priority"];
+
+/** Relative worker time per scan type (http_smuggling = 1) */
+export const SCAN_COSTS: Record<ScanType, number> = {
+  http_smuggling: 1,
+  ssrf: 2,
+  xss: 2,
+  subdomain_enum: 8,
+  comprehensive: 13, // all of the above
+};
+
+export const PRIORITY_WEIGHTS: Record<ScanPriority, number> = {
+  low: 1,
+  normal: 2,
+  high: 4,
+};
+
+export const USAGE_HALF_LIFE_MS = 15 * 60_000;
+/** Dispatches older than this weigh under 1/16 and are ignored */
+export const USAGE_WINDOW_MS = 4 * USAGE_HALF_LIFE_MS;
+/**
+ * A scan's weight grows linearly with its wait, by its priority weight for
+ * every AGING_MS (2x after one interval, 3x after two), so a low priority
+ * scan outranks a fresh high one from the same user after 3 * AGING_MS
+ */
+export const AGING_MS = 30 * 60_000;
+
+export type QueuedScan = Pick<Scan, "id" | "userId" | "scanType" | "priority" | "createdAt">;
+export type DispatchedScan = Pick<Scan, "userId" | "scanType" | "workerPickedAt">;
+
+/** Decayed cost of each user's recent dispatches */
+export function userUsage(dispatched: DispatchedScan[], now: number): Map<number, number> {
+  const usage = new Map<number, number>();
+  for (const scan of dispatched) {
+    if (!scan.workerPickedAt) continue;
+    const age = Math.max(0, now - scan.workerPickedAt.getTime());
+    if (age > USAGE_WINDOW_MS) continue;
+    const charge = SCAN_COSTS[scan.scanType] * Math.pow(0.5, age / USAGE_HALF_LIFE_MS);
+    usage.set(scan.userId, (usage.get(scan.userId) ?? 0) + charge);
+  }
+  return usage;
+}
+
+export function scanScore(scan: QueuedScan, usage: Map<number, number>, now: number): number {
+  const waited = Math.max(0, now - scan.createdAt.getTime());
+  const weight = PRIORITY_WEIGHTS[scan.priority] * (1 + waited / AGING_MS);
+  return ((usage.get(scan.userId) ?? 0) + SCAN_COSTS[scan.scanType]) / weight;
+}
+
+/** Candidates in dispatch order; ties go to the older scan */
+export function orderCandidates<T extends QueuedScan>(candidates: T[], dispatched: DispatchedScan[], now: number): T[] {
+  const usage = userUsage(dispatched, now);
+  return candidates
+    .map(scan => ({ scan, score: scanScore(scan, usage, now) }))
+    .sort((a, b) => a.score - b.score || a.scan.createdAt.getTime() - b.scan.createdAt.getTime() || a.scan.id - b.scan.id)
+    .map(entry => entry.scan);
+}
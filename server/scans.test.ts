@@ -70,6 +70,19 @@ describe("scans router", () => {
     expect(result.status).toBe("pending");
   });
 
+  it("should reserve high priority for admins", async () => {
+    const ctx = createAuthContext();
+    const caller = appRouter.createCaller(ctx);
+
+    await expect(
+      caller.scans.create({
+        scanType: "xss",
+        target: "https://example.com",
+        priority: "high",
+      })
+    ).rejects.toThrow("admin");
+  });
+
   it("should allow admin to view all scans", async () => {
     const adminCtx = createAuthContext("admin");
     const adminCaller = appRouter.createCaller(adminCtx);
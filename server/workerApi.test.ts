@@ -0,0 +1,81 @@
+import { describe, expect, it } from "vitest";
+import { parseWorkerState, routableTypes, type WorkerState } from "./workerApi";
+
+const NOW = Date.UTC(2026, 0, 1);
+
+function worker(overrides: Partial<WorkerState> = {}): WorkerState {
+  return {
+    capabilities: ["http_smuggling", "ssrf", "xss", "subdomain_enum", "comprehensive"],
+    maxConcurrency: 2,
+    running: 0,
+    cpus: 4,
+    load: 0.1,
+    lastSeen: NOW,
+    ...overrides,
+  };
+}
+
+describe("worker routing", () => {
+  it("should read capabilities and load from the poll", () => {
+    const state = parseWorkerState(
+      { capabilities: "xss,ssrf,bogus", maxConcurrency: "4", running: "1", cpus: "8", load: "0.5" },
+      NOW
+    );
+
+    expect(state.capabilities).toEqual(["ssrf", "xss"]);
+    expect(state).toMatchObject({ maxConcurrency: 4, running: 1, cpus: 8, load: 0.5 });
+  });
+
+  it("should offer every scan type to workers that do not report capabilities", () => {
+    const state = parseWorkerState({}, NOW);
+
+    expect(state.capabilities).toHaveLength(5);
+    expect(state).toMatchObject({ maxConcurrency: 1, running: 0, cpus: null, load: null });
+  });
+
+  it("should only route scan types the worker can run", () => {
+    const self = worker({ capabilities: ["xss", "ssrf"] });
+
+    expect(routableTypes("a", self, new Map([["a", self]]), NOW)).toEqual(["xss", "ssrf"]);
+  });
+
+  it("should give nothing to a worker with every slot busy", () => {
+    const self = worker({ running: 2 });
+
+    expect(routableTypes("a", self, new Map([["a", self]]), NOW)).toEqual([]);
+  });
+
+  it("should leave shared scan types to a less loaded peer", () => {
+    const self = worker({ running: 1 });
+    const peers = new Map([
+      ["a", self],
+      ["b", worker({ capabilities: ["xss"] })],
+    ]);
+
+    expect(routableTypes("a", self, peers, NOW)).not.toContain("xss");
+    expect(routableTypes("a", self, peers, NOW)).toContain("subdomain_enum");
+  });
+
+  it("should ignore peers that are full, busier or stale", () => {
+    const self = worker({ running: 1 });
+    const peers = new Map([
+      ["a", self],
+      ["full", worker({ maxConcurrency: 1, running: 1 })],
+      ["busier", worker({ running: 2, maxConcurrency: 3 })],
+      ["stale", worker({ lastSeen: NOW - 60_000 })],
+    ]);
+
+    expect(routableTypes("a", self, peers, NOW)).toEqual(self.capabilities);
+  });
+
+  it("should break ties in busy slots by CPU load", () => {
+    const self = worker({ load: 0.9 });
+    const peers = new Map([
+      ["a", self],
+      ["b", worker({ load: 0.2 })],
+    ]);
+
+    expect(routableTypes("a", self, peers, NOW)).toEqual([]);
+    expect(routableTypes("b", peers.get("b")!, peers, NOW)).toEqual(self.capabilities);
+  });
+});
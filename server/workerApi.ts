@@ -1,11 +1,223 @@
 import { Router } from "express";
-import { createScanLog, getAllScans, updateScan } from "./db";
+import { createScanLog, getScanById, getScansReusing, updateScan } from "./db";
+import { claimPendingScan, getPendingScanHeads, getPendingScansForTarget, getRunningScanByResultKey, getScansDispatchedSince } from "./db";
 import { createVulnerability } from "./db";
 import { createReport } from "./db";
+import { getFreshScanResult, upsertScanResult } from "./db";
 import { ENV } from "./_core/env";
+import { normalizeTarget, resultKey, REUSE_WINDOW_MS, UNVERSIONED } from "./scanDedup";
+import { orderCandidates, USAGE_WINDOW_MS, type ScanType } from "./scanScheduler";
+import { scans } from "../drizzle/schema";
+import type { Scan, ScanResult, ScanTelemetry } from "../drizzle/schema";
 
 const router = Router();
 
+/**
+ * Telemetry reported by the worker, plus the backend's side of the job:
+ * how long it queued, how long the upload took (from the worker's sentAt,
+ * so only as good as the two clocks agree) and how long storing took.
+ */
+function backendTelemetry(
+  telemetry: unknown,
+  scan: { createdAt: Date; workerPickedAt: Date | null } | undefined,
+  receivedAt: number,
+  storeMs: number
+): ScanTelemetry {
+  const reported = (telemetry && typeof telemetry === "object" ? telemetry : {}) as ScanTelemetry;
+  const sentAt = reported.worker?.sentAt;
+  return {
+    scanner: reported.scanner ?? null,
+    profile: reported.profile ?? null,
+    worker: reported.worker,
+    backend: {
+      receivedAt: new Date(receivedAt).toISOString(),
+      queueMs: scan?.workerPickedAt ? scan.workerPickedAt.getTime() - scan.createdAt.getTime() : null,
+      uploadMs: typeof sentAt === "number" ? Math.max(0, receivedAt - sentAt) : null,
+      storeMs,
+    },
+  };
+}
+
+/** Vulnerability rows and report of a scan, from a worker upload or a stored result */
+async function storeScanOutput(scanId: number, vulnerabilities: unknown, report: any) {
+  if (vulnerabilities && Array.isArray(vulnerabilities)) {
+    for (const vuln of vulnerabilities) {
+      await createVulnerability({
+        scanId,
+        type: vuln.type,
+        severity: vuln.severity,
+        title: vuln.title,
+        description: vuln.description,
+        payload: vuln.payload,
+        evidence: vuln.evidence,
+        remediation: vuln.remediation,
+        cvss: vuln.cvss,
+      });
+    }
+  }
+
+  if (report) {
+    await createReport({
+      scanId,
+      content: report.content,
+      summary: report.summary,
+    });
+  }
+}
+
+/** Completes a duplicate scan with a copy of an identical scan's result instead of running it */
+async function completeFromResult(scan: Scan, stored: Omit<ScanResult, "id">) {
+  await storeScanOutput(scan.id, stored.vulnerabilities, stored.report);
+  const now = new Date();
+  await updateScan(scan.id, {
+    status: "completed",
+    workerPickedAt: scan.workerPickedAt ?? now,
+    completedAt: now,
+    duration: 0,
+    moduleVersion: stored.moduleVersion,
+    resultKey: stored.resultKey,
+    reusedFromScanId: stored.sourceScanId,
+  });
+  await createScanLog({
+    scanId: scan.id,
+    message: `[*] Reused result of identical scan #${stored.sourceScanId} (completed ${stored.completedAt.toISOString()})`,
+    timestamp: now,
+  });
+}
+
+/** Parks a pending duplicate on an identical running scan; it completes or fails with it */
+async function coalesceInto(scan: Scan, leader: Scan) {
+  const claimed = await claimPendingScan(scan.id, {
+    workerId: leader.workerId,
+    workerPickedAt: new Date(),
+    moduleVersion: leader.moduleVersion,
+    resultKey: leader.resultKey,
+    reusedFromScanId: leader.id,
+  });
+  if (claimed) {
+    await createScanLog({
+      scanId: scan.id,
+      message: `[*] Identical scan #${leader.id} is already running; sharing its result`,
+      timestamp: new Date(),
+    });
+  }
+}
+
+// Rounds of queue heads read per poll when every head turned out to be a duplicate
+const MAX_DISPATCH_PASSES = 5;
+// A worker that has not polled for this long no longer counts for routing
+const WORKER_STALE_MS = 30_000;
+const SCAN_TYPES: readonly ScanType[] = scans.scanType.enumValues;
+
+/** What a worker reported on its last poll */
+export type WorkerState = {
+  capabilities: ScanType[];
+  maxConcurrency: number;
+  running: number;
+  cpus: number | null;
+  load: number | null; // 1-minute load average per CPU
+  lastSeen: number;
+};
+
+// Live workers by id, from their polls (this backend process only)
+const workers = new Map<string, WorkerState>();
+
+export function parseWorkerState(query: Record<string, unknown>, now: number): WorkerState {
+  const number = (value: unknown) => {
+    const parsed = typeof value === "string" && value !== "" ? Number(value) : NaN;
+    return Number.isFinite(parsed) ? parsed : null;
+  };
+  const reported = typeof query.capabilities === "string" ? query.capabilities.split(",") : null;
+  const capabilities = reported ? SCAN_TYPES.filter(type => reported.includes(type)) : [...SCAN_TYPES]; // workers that do not report capabilities are offered everything
+  return {
+    capabilities,
+    maxConcurrency: Math.max(1, number(query.maxConcurrency) ?? 1),
+    running: Math.max(0, number(query.running) ?? 0),
+    cpus: number(query.cpus),
+    load: number(query.load),
+    lastSeen: now,
+  };
+}
+
+/** Busy slots first, CPU load per core to break ties */
+function lessLoaded(a: WorkerState, b: WorkerState): boolean {
+  const utilization = (worker: WorkerState) => worker.running / worker.maxConcurrency;
+  if (utilization(a) !== utilization(b)) {
+    return utilization(a) < utilization(b);
+  }
+  return a.load !== null && b.load !== null && a.load < b.load;
+}
+
+/**
+ * Scan types to offer a polling worker: those it can run, less the ones a
+ * live, less loaded peer with a free slot can also run (that peer takes
+ * them on its next poll). A worker with every slot busy gets nothing.
+ */
+export function routableTypes(workerId: string, worker: WorkerState, peers: Map<string, WorkerState>, now: number): ScanType[] {
+  if (worker.running >= worker.maxConcurrency) {
+    return [];
+  }
+  const idler = Array.from(peers).filter(([id, peer]) =>
+    id !== workerId &&
+    now - peer.lastSeen <= WORKER_STALE_MS &&
+    peer.running < peer.maxConcurrency &&
+    lessLoaded(peer, worker)
+  );
+  return worker.capabilities.filter(type => !idler.some(([, peer]) => peer.capabilities.includes(type)));
+}
+
+/**
+ * Claims the next scan of one of `scanTypes` for a worker, in scheduler
+ * order (fair share, priority, cost; see scanScheduler.ts). Duplicates met on the way are
+ * settled instead of dispatched: one identical to a scan that finished
+ * within the reuse window is completed from its stored result, one
+ * identical to a running scan waits for it.
+ */
+async function dispatchNext(workerId: string, moduleVersion: string, scanTypes: ScanType[]): Promise<Scan | undefined> {
+  const freshSince = new Date(Date.now() - REUSE_WINDOW_MS);
+
+  for (let pass = 0; pass < MAX_DISPATCH_PASSES; pass++) {
+    const heads = await getPendingScanHeads(scanTypes);
+    if (heads.length === 0) {
+      return undefined;
+    }
+    const now = Date.now();
+    const dispatched = await getScansDispatchedSince(new Date(now - USAGE_WINDOW_MS));
+
+    for (const pendingScan of orderCandidates(heads, dispatched, now)) {
+      const key = resultKey(pendingScan.scanType, pendingScan.target, moduleVersion);
+
+      const stored = REUSE_WINDOW_MS > 0 ? await getFreshScanResult(key, freshSince) : undefined;
+      if (stored) {
+        if (await claimPendingScan(pendingScan.id, { workerPickedAt: new Date(), reusedFromScanId: stored.sourceScanId })) {
+          await completeFromResult(pendingScan, stored);
+        }
+        continue;
+      }
+
+      const leader = await getRunningScanByResultKey(key);
+      if (leader) {
+        await coalesceInto(pendingScan, leader);
+        continue;
+      }
+
+      // Marcar como running e atribuir ao worker
+      const picked = { workerId, workerPickedAt: new Date(), moduleVersion, resultKey: key };
+      if (!(await claimPendingScan(pendingScan.id, picked))) {
+        continue; // another worker's poll got it first
+      }
+      const scan: Scan = { ...pendingScan, ...picked, status: "running" };
+
+      // Identical scans still queued behind it share this execution
+      for (const duplicate of await getPendingScansForTarget(scan.scanType, scan.target)) {
+        await coalesceInto(duplicate, scan);
+      }
+      return scan;
+    }
+  }
+  return undefined;
+}
+
 // Middleware para autenticar worker
 const authenticateWorker = (req: any, res: any, next: any) => {
   const apiKey = req.headers["x-worker-api-key"];
@@ -27,32 +239,33 @@ router.use(authenticateWorker);
 router.get("/jobs/pending", async (req, res) => {
   try {
     const workerId = req.query.workerId as string;
+    const moduleVersion = (req.query.moduleVersion as string) || UNVERSIONED;
     
     if (!workerId) {
       return res.status(400).json({ error: "workerId required" });
     }
 
-    // Buscar primeiro scan pendente
-    const scans = await getAllScans();
-    const pendingScan = scans.find(s => s.status === "pending");
-    
-    if (!pendingScan) {
+    // Capabilities and load reported on this poll; stale workers drop out
+    const now = Date.now();
+    const worker = parseWorkerState(req.query, now);
+    workers.forEach((peer, id) => {
+      if (now - peer.lastSeen > WORKER_STALE_MS) workers.delete(id);
+    });
+    workers.set(workerId, worker);
+
+    const scan = await dispatchNext(workerId, moduleVersion, routableTypes(workerId, worker, workers, now));
+    if (!scan) {
       return res.json({ job: null });
     }
-
-    // Marcar como running e atribuir ao worker
-    await updateScan(pendingScan.id, {
-      status: "running",
-      workerId,
-      workerPickedAt: new Date(),
-    });
+    worker.running += 1; // until its next poll reports the real count
 
     return res.json({
       job: {
-        id: pendingScan.id,
-        scanType: pendingScan.scanType,
-        target: pendingScan.target,
-        scope: pendingScan.scope,
+        id: scan.id,
+        scanType: scan.scanType,
+        target: scan.target,
+        scope: scan.scope,
+        createdAt: scan.createdAt, // lets the worker measure queue wait
       },
     });
   } catch (error: any) {
@@ -93,8 +306,9 @@ router.post("/jobs/:id/logs", async (req, res) => {
  */
 router.post("/jobs/:id/results", async (req, res) => {
   try {
+    const receivedAt = Date.now();
     const scanId = parseInt(req.params.id);
-    const { status, vulnerabilities, report, duration } = req.body;
+    const { status, vulnerabilities, report, duration, telemetry } = req.body;
 
     // Atualizar scan
     await updateScan(scanId, {
@@ -103,30 +317,34 @@ router.post("/jobs/:id/results", async (req, res) => {
       duration,
     });
 
-    // Salvar vulnerabilidades
-    if (vulnerabilities && Array.isArray(vulnerabilities)) {
-      for (const vuln of vulnerabilities) {
-        await createVulnerability({
-          scanId,
-          type: vuln.type,
-          severity: vuln.severity,
-          title: vuln.title,
-          description: vuln.description,
-          payload: vuln.payload,
-          evidence: vuln.evidence,
-          remediation: vuln.remediation,
-          cvss: vuln.cvss,
-        });
-      }
-    }
+    // Salvar vulnerabilidades e relatório
+    await storeScanOutput(scanId, vulnerabilities, report);
 
-    // Salvar relatório
-    if (report) {
-      await createReport({
-        scanId,
-        content: report.content,
-        summary: report.summary,
-      });
+    // Telemetry last, so storeMs covers the writes above
+    const scan = await getScanById(scanId);
+    await updateScan(scanId, {
+      telemetry: backendTelemetry(telemetry, scan, receivedAt, Date.now() - receivedAt),
+    });
+
+    // Keep the result for identical scans, starting with those coalesced onto this one
+    if (scan?.resultKey && !scan.reusedFromScanId && scan.status === "completed") {
+      const stored = {
+        resultKey: scan.resultKey,
+        scanType: scan.scanType,
+        target: normalizeTarget(scan.target),
+        moduleVersion: scan.moduleVersion ?? UNVERSIONED,
+        sourceScanId: scanId,
+        vulnerabilities: Array.isArray(vulnerabilities) ? vulnerabilities : [],
+        report: report ? { content: report.content, summary: report.summary } : null,
+        duration: duration ?? null,
+        completedAt: new Date(),
+      };
+      await upsertScanResult(stored);
+      for (const follower of await getScansReusing(scanId)) {
+        if (follower.status === "running") {
+          await completeFromResult(follower, stored);
+        }
+      }
     }
 
     return res.json({ success: true });
@@ -156,6 +374,18 @@ router.post("/jobs/:id/error", async (req, res) => {
       timestamp: new Date(),
     });
 
+    // Scans coalesced onto this one fail with it
+    for (const follower of await getScansReusing(scanId)) {
+      if (follower.status === "running") {
+        await updateScan(follower.id, { status: "failed", completedAt: new Date() });
+        await createScanLog({
+          scanId: follower.id,
+          message: `[!] ERROR: identical scan #${scanId} failed: ${error}`,
+          timestamp: new Date(),
+        });
+      }
+    }
+
     return res.json({ success: true });
   } catch (error: any) {
     console.error("[Worker API] Error reporting error:", error);
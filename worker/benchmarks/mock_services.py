@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Mock Services - BreakingCID Platform
+Local stand-ins for everything the scanners talk to, so they can be
+benchmarked offline: an HTTP app with configurable reflection, template,
+DOM-sink and SSRF behaviour (which also serves a fake crt.sh and acts as
+the HTTP proxy subdomain probes go through), a raw front-end/back-end
+chain that desyncs CL.TE or TE.CL, and a stub DNS server. Every service
+adds a fixed latency to its answers and counts what it served.
+"""
+
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+BENCH_DOMAIN = "bench.test"
+REFLECT_PARAMS = ('q', 'search')  # echoed back unencoded
+TEMPLATE_PARAMS = ('name',)  # {{7*7}} / ${7*7} evaluated
+TEMPLATE_EXPRESSIONS = ("{{7*7}}", "${7*7}", "#{7*7}")
+SSRF_PATHS = ('/api/fetch', '/proxy')  # fetch ?url= and leak metadata
+SSRF_PARAM = 'url'
+METADATA_HOSTS = ('169.254.169.254', 'metadata.google.internal')
+METADATA_BODY = "ami-id\ninstance-id\nlocal-ipv4\n"
+DOM_SINK_PAGE = "<script>document.write(location.hash)</script>"
+SMUGGLING_MODES = ('clte', 'tecl', 'none')
+HEX_DIGITS = frozenset(b"0123456789abcdefABCDEF")
+
+class Counter:
+    """Thread-safe count of requests served, readable and resettable between runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def add(self, n=1):
+        with self._lock:
+            self.value += n
+
+    def take(self):
+        """Return the count and reset it"""
+        with self._lock:
+            value, self.value = self.value, 0
+            return value
+
+class MockApp:
+    """
+    Settings for the mock HTTP app. A scanner pointed at it should find one
+    reflected XSS per REFLECT_PARAMS entry, one template injection per
+    TEMPLATE_PARAMS entry, one DOM sink and one SSRF per SSRF_PATHS entry.
+    """
+
+    def __init__(self, latency=0.0, reflect=REFLECT_PARAMS, template=TEMPLATE_PARAMS, ssrf=SSRF_PATHS,
+                 dom_sink=True, ct_names=()):
+        self.latency = latency
+        self.reflect = frozenset(reflect)
+        self.template = frozenset(template)
+        self.ssrf = frozenset(ssrf)
+        self.dom_sink = dom_sink
+        self.ct_names = list(ct_names)
+        self.requests = Counter()
+
+    def expected(self):
+        return {
+            "xss": len(self.reflect) + len(self.template) + int(self.dom_sink),
+            "ssrf": len(self.ssrf),
+        }
+
+    def page(self, path, params):
+        """Return (status, content type, body) for a GET"""
+        if path == '/ct':
+            return 200, 'application/json', self.ct_body()
+        if path in self.ssrf:
+            target = params.get(SSRF_PARAM, '')
+            if any(host in target for host in METADATA_HOSTS):
+                return 200, 'text/plain', METADATA_BODY
+            return 400, 'text/plain', "bad request"
+        if path != '/':
+            return 404, 'text/plain', "not found"
+        parts = ["<html><head><title>Bench</title></head><body>"]
+        for name, value in params.items():
+            if name in self.reflect:
+                parts.append(f"<p>Results for {value}</p>")
+            elif name in self.template:
+                # Only the evaluated result is rendered: the scanner also
+                # counts an HTML-encoded echo of its payload as reflected
+                evaluated = any(expression in value for expression in TEMPLATE_EXPRESSIONS)
+                parts.append(f"<p>Hello {'49' if evaluated else 'guest'}</p>")
+        if self.dom_sink:
+            parts.append(DOM_SINK_PAGE)
+        parts.append("</body></html>")
+        return 200, 'text/html', "".join(parts)
+
+    def ct_body(self):
+        """crt.sh-style JSON, a few names per certificate"""
+        entries = []
+        for index in range(0, len(self.ct_names), 3):
+            names = self.ct_names[index:index + 3]
+            entries.append({"id": index + 1, "name_value": "\n".join(names)})
+        return json.dumps(entries)
+
+class _AppHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send head and body in one segment; split writes hit delayed ACKs
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        app = self.server.app
+        app.requests.add()
+        if app.latency:
+            time.sleep(app.latency)
+        split = urlsplit(self.path)
+        if split.scheme:
+            # Absolute-form request: we are the proxy for a subdomain probe
+            status, content_type = 200, 'text/html'
+            body = f"<html><head><title>{split.hostname}</title></head><body>up</body></html>"
+        else:
+            params = {name: values[0] for name, values in parse_qs(split.query).items()}
+            status, content_type, body = app.page(split.path, params)
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('Server', 'bench')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_CONNECT(self):
+        # No TLS here: HTTPS probes fail fast and fall back to HTTP
+        self.server.app.requests.add()
+        self.send_error(405)
+        self.close_connection = True
+
+class MockHTTPServer:
+    def __init__(self, app, host='127.0.0.1', port=0):
+        self.app = app
+        self.server = ThreadingHTTPServer((host, port), _AppHandler)
+        self.server.daemon_threads = True
+        self.server.app = app
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class ServiceLoop:
+    """One background event loop hosting the asyncio-based services"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+def split_request(buf, chunked_aware):
+    """
+    Frame one request in `buf` the way a server that does (or does not)
+    honour Transfer-Encoding would. Returns (request, rest), or None until
+    more bytes arrive. Raises ValueError on a malformed chunk.
+    """
+    end = buf.find(b"\r\n\r\n")
+    if end < 0:
+        return None
+    head_end = end + 4
+    length, chunked = 0, False
+    for line in buf[:end].split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == b"content-length":
+            length = int(value or 0)
+        elif name == b"transfer-encoding" and value == b"chunked":
+            chunked = True
+    if not (chunked and chunked_aware):
+        if len(buf) < head_end + length:
+            return None
+        return buf[:head_end + length], buf[head_end + length:]
+    pos = head_end
+    while True:
+        line_end = buf.find(b"\r\n", pos)
+        if line_end < 0:
+            if not HEX_DIGITS.issuperset(buf[pos:]):
+                raise ValueError("Invalid chunk size")
+            return None
+        size = int(buf[pos:line_end].split(b";")[0], 16)
+        pos = line_end + 2
+        if size == 0:
+            if len(buf) < pos + 2:
+                return None
+            return buf[:pos + 2], buf[pos + 2:]
+        if len(buf) < pos + size + 2:
+            return None
+        pos += size + 2
+
+class SmugglingServer:
+    """
+    A front-end and back-end in one socket. The front-end frames requests
+    from the client and forwards them; the back-end re-frames the forwarded
+    bytes with its own rules. In 'clte' the front-end uses Content-Length
+    and the back-end chunked encoding, 'tecl' the reverse, 'none' agrees.
+    Leftover bytes poison the next request on the connection, and a
+    back-end waiting for bytes the front-end never sends stalls until the
+    client gives up.
+    """
+
+    def __init__(self, mode, latency=0.0):
+        if mode not in SMUGGLING_MODES:
+            raise ValueError(f"Unknown smuggling mode: {mode}")
+        self.mode = mode
+        self.latency = latency
+        self.requests = Counter()
+        self.server = None
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}/"
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        front_te = self.mode != 'clte'
+        back_te = self.mode != 'tecl'
+        incoming = b""
+        forwarded = b""
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                incoming += data
+                # Front-end: forward every complete request it sees
+                while True:
+                    framed = split_request(incoming, front_te)
+                    if framed is None:
+                        break
+                    request, incoming = framed
+                    forwarded += request
+                # Back-end: answer every complete request in what was forwarded
+                while True:
+                    framed = split_request(forwarded, back_te)
+                    if framed is None:
+                        break
+                    request, forwarded = framed
+                    await self.respond(writer, request)
+        except ValueError:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, request):
+        self.requests.add()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        request_line = request.split(b"\r\n", 1)[0]
+        path = request_line.split(b" ")[1] if request_line.count(b" ") >= 2 else b"/"
+        status = b"404 Not Found" if path.startswith(b"/admin") else b"200 OK"
+        writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Length: 2\r\nContent-Type: text/plain\r\n\r\nok")
+        await writer.drain()
+
+class _DNSProtocol(asyncio.DatagramProtocol):
+    def __init__(self, stub):
+        self.stub = stub
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.stub.queries.add()
+        try:
+            query = dns.message.from_wire(data)
+        except Exception:
+            return
+        response = dns.message.make_response(query)
+        question = query.question[0]
+        addresses = self.stub.records.get(question.name.to_text().rstrip('.').lower())
+        if addresses and question.rdtype == dns.rdatatype.A:
+            response.answer.append(dns.rrset.from_text(question.name, self.stub.ttl, 'IN', 'A', *addresses))
+        elif not addresses:
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        wire = response.to_wire()
+        if self.stub.latency:
+            asyncio.get_running_loop().call_later(self.stub.latency, self.transport.sendto, wire, addr)
+        else:
+            self.transport.sendto(wire, addr)
+
+class StubDNS:
+    """
+    Authoritative-looking answers for `records` (name -> [IPv4, ...]),
+    NXDOMAIN for everything else. Listens on one port across several
+    loopback addresses so the scanner's per-resolver rate cap is not what
+    gets measured.
+    """
+
+    def __init__(self, records, latency=0.0, addresses=('127.0.0.1',), ttl=300):
+        self.records = {name.lower(): list(ips) for name, ips in records.items()}
+        self.latency = latency
+        self.addresses = list(addresses)
+        self.ttl = ttl
+        self.queries = Counter()
+        self.port = None
+        self.nameservers = []
+        self._transports = []
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        for address in self.addresses:
+            try:
+                transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _DNSProtocol(self), local_addr=(address, self.port or 0))
+            except OSError:
+                # Only 127.0.0.1 is configured on some systems (macOS)
+                continue
+            self.port = transport.get_extra_info('sockname')[1]
+            self.nameservers.append(address)
+            self._transports.append(transport)
+        if not self._transports:
+            raise OSError("Stub DNS could not bind any address")
+        return self
+
+    async def stop(self):
+        for transport in self._transports:
+            transport.close()
+
+def loopback_addresses(count):
+    return [f"127.0.0.{n}" for n in range(1, count + 1)]
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Scanner Benchmarks - BreakingCID Platform
+Runs each scanner against the local mock services (mock_services.py) with
+a fixed latency and reports wall time, requests/sec, peak RSS and
+detections against what the mocks plant. Nothing leaves the machine.
+
+Each scanner runs in its own process so peak RSS is its own. The
+per-host rate limit is off unless --host-rps is given: the benchmark
+measures the scanners, not the politeness budget.
+
+Usage: run_benchmarks.py [xss,ssrf,smuggling,subdomain] [--latency S]
+       [--dns-latency S] [--words N] [--resolvers N] [--host-rps N]
+       [--baseline FILE] [--tolerance F] [--output FILE] [--verbose]
+Exits 1 when a scanner misses a planted finding (or reports one that was
+not planted) or runs slower than the baseline allows.
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import multiprocessing
+from pathlib import Path
+from mock_services import (BENCH_DOMAIN, MockApp, MockHTTPServer, ServiceLoop, SmugglingServer, StubDNS,
+                           loopback_addresses)
+
+WORKER_DIR = Path(__file__).resolve().parent.parent
+SCANNER_PATHS = (str(WORKER_DIR / "modules"), str(WORKER_DIR / "utils"))
+BENCHMARKS = ('xss', 'ssrf', 'smuggling', 'subdomain')
+DEFAULT_LATENCY = 0.005
+DEFAULT_WORDS = 2000
+DEFAULT_RESOLVERS = 4
+DEFAULT_TOLERANCE = 0.25  # slowdown over the baseline wall time that counts as a regression
+BENCH_TIMEOUT = 600
+
+# Live subdomains: some come from CT, some only from the wordlist, and the
+# rest only from permutations of names already found
+CT_LABELS = ('www', 'mail', 'api')
+WORDLIST_LABELS = ('dev', 'vpn', 'staging')
+PERMUTATION_LABELS = ('api2', 'dev-api', 'staging.api')
+SMUGGLING_EXPECTED = {'clte': 1, 'tecl': 1, 'none': 0}
+
+def option(name, default, cast=str):
+    args = sys.argv[1:]
+    if name in args:
+        index = args.index(name)
+        if index + 1 < len(args):
+            return cast(args[index + 1])
+    return default
+
+def write_wordlist(path, words):
+    """Planted words first so permutations pick them up, then filler"""
+    with open(path, 'w') as f:
+        for label in WORDLIST_LABELS + ('www',):
+            f.write(label + "\n")
+        for index in range(max(0, words - len(WORDLIST_LABELS) - 1)):
+            f.write(f"host{index}\n")
+
+# --- run inside the benchmark process ----------------------------------
+
+def bench_xss(setup):
+    from xss_scanner import XSSScanner
+    return len(XSSScanner(setup['url'] + '/').scan()['vulnerabilities'])
+
+def bench_ssrf(setup):
+    from ssrf_scanner import SSRFTester
+    return SSRFTester(setup['url'] + '/').scan()['vulnerabilities_found']
+
+def bench_smuggling(setup):
+    from http_smuggling import HTTPSmugglingTester
+    return sum(HTTPSmugglingTester(target).scan()['vulnerabilities_found'] for target in setup['targets'])
+
+def bench_subdomain(setup):
+    from subdomain_enum import SubdomainEnumerator
+    enumerator = SubdomainEnumerator(BENCH_DOMAIN, nameservers=setup['nameservers'], dns_port=setup['dns_port'],
+                                     ct_url=setup['ct_url'], wordlist=setup['wordlist'])
+    return enumerator.enumerate()['active_count']
+
+RUNNERS = {
+    'xss': bench_xss,
+    'ssrf': bench_ssrf,
+    'smuggling': bench_smuggling,
+    'subdomain': bench_subdomain,
+}
+
+def run_child(name, setup, env, verbose, conn):
+    os.environ.update(env)
+    sys.path[:0] = SCANNER_PATHS
+    if not verbose:
+        sys.stderr = open(os.devnull, 'w')
+    from scanner_runtime import metrics, peak_rss_mb
+    start = time.perf_counter()
+    try:
+        detections, error = RUNNERS[name](setup), None
+    except Exception as e:
+        detections, error = 0, f"{type(e).__name__}: {e}"
+    conn.send({
+        "wall_time": time.perf_counter() - start,
+        "detections": detections,
+        "error": error,
+        "peak_rss_mb": peak_rss_mb(),
+        "client": metrics.snapshot(),
+    })
+    conn.close()
+
+# --- run in the parent --------------------------------------------------
+
+class BenchmarkSuite:
+    def __init__(self, latency=DEFAULT_LATENCY, dns_latency=None, words=DEFAULT_WORDS,
+                 resolvers=DEFAULT_RESOLVERS, host_rps=0, verbose=False):
+        self.latency = latency
+        self.dns_latency = latency if dns_latency is None else dns_latency
+        self.words = words
+        self.resolvers = resolvers
+        self.host_rps = host_rps
+        self.verbose = verbose
+        self.context = multiprocessing.get_context('spawn')
+
+    def start(self, workdir):
+        self.workdir = workdir
+        live = CT_LABELS + WORDLIST_LABELS + PERMUTATION_LABELS
+        self.live = [f"{label}.{BENCH_DOMAIN}" for label in live]
+        self.app = MockApp(self.latency, ct_names=[f"{label}.{BENCH_DOMAIN}" for label in CT_LABELS])
+        self.http = MockHTTPServer(self.app).start()
+        self.loop = ServiceLoop()
+        self.smuggling = {mode: self.loop.run(SmugglingServer(mode, self.latency).start())
+                          for mode in SMUGGLING_EXPECTED}
+        self.dns = self.loop.run(StubDNS({name: ['127.0.0.1'] for name in self.live}, self.dns_latency,
+                                         loopback_addresses(self.resolvers)).start())
+        self.wordlist = os.path.join(workdir, "subdomains.txt")
+        write_wordlist(self.wordlist, self.words)
+
+    def stop(self):
+        for server in self.smuggling.values():
+            self.loop.run(server.stop())
+        self.loop.run(self.dns.stop())
+        self.loop.stop()
+        self.http.stop()
+
+    def plan(self, name):
+        """Return (setup, expected detections, extra environment) for a benchmark"""
+        url = self.http.url
+        if name == 'xss':
+            return {'url': url}, self.app.expected()['xss'], {}
+        if name == 'ssrf':
+            return {'url': url}, self.app.expected()['ssrf'], {}
+        if name == 'smuggling':
+            targets = [server.url for server in self.smuggling.values()]
+            return {'targets': targets}, sum(SMUGGLING_EXPECTED.values()), {}
+        setup = {
+            'nameservers': self.dns.nameservers,
+            'dns_port': self.dns.port,
+            'ct_url': f"{url}/ct?q=%25.{{domain}}&output=json",
+            'wordlist': self.wordlist,
+        }
+        # Liveness probes go to made-up hostnames; the mock app proxies them
+        env = {'HTTP_PROXY': url, 'HTTPS_PROXY': url, 'NO_PROXY': '127.0.0.1,localhost'}
+        return setup, len(self.live), env
+
+    def reset_counters(self):
+        self.app.requests.take()
+        self.dns.queries.take()
+        for server in self.smuggling.values():
+            server.requests.take()
+
+    def run(self, name):
+        setup, expected, env = self.plan(name)
+        # No response cache and fresh host limits: every run starts cold,
+        # whatever ran before it
+        env = dict(env, SCAN_HOST_RPS=str(self.host_rps), RESPONSE_CACHE_TTL='0',
+                   HOST_LIMITS_PATH=os.path.join(self.workdir, f"host_limits-{name}.sqlite3"))
+        self.reset_counters()
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=run_child, args=(name, setup, env, self.verbose, sender))
+        process.start()
+        sender.close()
+        try:
+            outcome = receiver.recv() if receiver.poll(BENCH_TIMEOUT) else None
+        except EOFError:
+            outcome = None  # the process died before reporting
+        process.join(5)
+        if process.is_alive():
+            process.terminate()
+        if outcome is None:
+            outcome = {"wall_time": BENCH_TIMEOUT, "detections": 0, "error": "timed out or crashed",
+                       "peak_rss_mb": 0.0, "client": {}}
+        requests = self.app.requests.take() + sum(server.requests.take() for server in self.smuggling.values())
+        dns_queries = self.dns.queries.take()
+        wall_time = outcome["wall_time"]
+        result = {
+            "name": name,
+            "wall_time": round(wall_time, 3),
+            "requests": requests,
+            "dns_queries": dns_queries,
+            "requests_per_sec": round((requests + dns_queries) / wall_time, 1) if wall_time else 0.0,
+            "peak_rss_mb": outcome["peak_rss_mb"],
+            "detections": outcome["detections"],
+            "expected": expected,
+            "client": outcome["client"],
+        }
+        if outcome["error"]:
+            result["error"] = outcome["error"]
+        return result
+
+def compare(results, baseline, tolerance):
+    """Regressions: errors, missed or spurious findings, runs slower than the baseline allows"""
+    previous = {entry["name"]: entry for entry in baseline.get("benchmarks", [])}
+    problems = []
+    for result in results:
+        name = result["name"]
+        if result.get("error"):
+            problems.append(f"{name}: {result['error']}")
+        if result["detections"] != result["expected"]:
+            problems.append(f"{name}: {result['detections']} findings, {result['expected']} planted")
+        before = previous.get(name)
+        if before and result["wall_time"] > before["wall_time"] * (1 + tolerance):
+            problems.append(f"{name}: wall time {result['wall_time']:.2f}s vs baseline {before['wall_time']:.2f}s")
+    return problems
+
+def print_table(results):
+    print(f"{'benchmark':<10} {'wall s':>8} {'req':>7} {'dns':>7} {'req/s':>8} {'rss MB':>7} {'found':>7}",
+          file=sys.stderr)
+    for r in results:
+        found = f"{r['detections']}/{r['expected']}"
+        print(f"{r['name']:<10} {r['wall_time']:>8.2f} {r['requests']:>7} {r['dns_queries']:>7} "
+              f"{r['requests_per_sec']:>8.1f} {r['peak_rss_mb']:>7.1f} {found:>7}", file=sys.stderr)
+
+def main():
+    selected = [arg for arg in sys.argv[1:2] if not arg.startswith('--')]
+    names = selected[0].split(',') if selected else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(json.dumps({"success": False, "error": f"Unknown benchmark: {', '.join(unknown)}"}))
+        sys.exit(1)
+
+    suite = BenchmarkSuite(
+        latency=option('--latency', DEFAULT_LATENCY, float),
+        dns_latency=option('--dns-latency', None, float),
+        words=option('--words', DEFAULT_WORDS, int),
+        resolvers=option('--resolvers', DEFAULT_RESOLVERS, int),
+        host_rps=option('--host-rps', 0, float),
+        verbose='--verbose' in sys.argv[1:],
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        suite.start(workdir)
+        try:
+            results = []
+            for name in names:
+                print(f"[*] Benchmarking {name}...", file=sys.stderr)
+                results.append(suite.run(name))
+        finally:
+            suite.stop()
+
+    baseline_path = option('--baseline', None)
+    baseline = {}
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    problems = compare(results, baseline, option('--tolerance', DEFAULT_TOLERANCE, float))
+
+    print_table(results)
+    for problem in problems:
+        print(f"[!] {problem}", file=sys.stderr)
+    report = {
+        "success": not problems,
+        "latency": suite.latency,
+        "dns_latency": suite.dns_latency,
+        "benchmarks": results,
+        "regressions": problems,
+    }
+    output = option('--output', None)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if not problems else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Recon Cache - BreakingCID Platform
+On-disk SQLite cache for subdomain enumeration: CT results per domain and
+DNS answers per name, with TTL expiry and a least-recently-used size cap.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+CACHE_PATH = os.getenv(
+    "RECON_CACHE_PATH",
+    str(Path(__file__).resolve().parent.parent / "cache" / "recon.sqlite3"),
+)
+CT_TTL = 6 * 3600  # crt.sh results are reused for this long before re-querying
+DNS_MIN_TTL = 300
+DNS_MAX_TTL = 86400
+DNS_NEGATIVE_TTL = 3600  # NXDOMAIN / no answer
+MAX_CT_ENTRIES = 5000
+MAX_DNS_ENTRIES = 1000000
+FLUSH_EVERY = 1000  # buffered DNS writes per transaction
+EVICT_EVERY = 50  # DNS flushes between expiry sweeps (plus one on close)
+
+MISS = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ct_results (
+    domain TEXT PRIMARY KEY,
+    names TEXT NOT NULL,
+    max_cert_id INTEGER NOT NULL DEFAULT 0,
+    fetched_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dns_answers (
+    name TEXT PRIMARY KEY,
+    addresses TEXT,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ct_results_last_used ON ct_results(last_used);
+CREATE INDEX IF NOT EXISTS dns_answers_last_used ON dns_answers(last_used);
+CREATE INDEX IF NOT EXISTS dns_answers_expires_at ON dns_answers(expires_at);
+"""
+
+class ReconCache:
+    """
+    DNS writes and last-used touches are buffered and written in batches, so
+    a brute force over a large wordlist costs one transaction per
+    FLUSH_EVERY answers rather than one per name. Expired and excess DNS
+    rows are swept every EVICT_EVERY flushes, on close, and as soon as the
+    running row count passes the cap, so a flush does not grow with the
+    table. Safe to share between the event loop and the CT fetch thread.
+    """
+
+    def __init__(self, path=CACHE_PATH, ct_ttl=CT_TTL, max_ct_entries=MAX_CT_ENTRIES,
+                 max_dns_entries=MAX_DNS_ENTRIES):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.ct_ttl = ct_ttl
+        self.max_ct_entries = max_ct_entries
+        self.max_dns_entries = max_dns_entries
+        self._pending = []
+        self._touched = set()
+        self._flushes = 0
+        # Counted once, then kept as an upper bound (a replaced row counts twice)
+        self._dns_rows = self.conn.execute("SELECT COUNT(*) FROM dns_answers").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    # ---- Certificate Transparency ----
+
+    def get_ct(self, domain):
+        """Return (names, max_cert_id, fresh) or None when the domain was never fetched"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT names, max_cert_id, fetched_at FROM ct_results WHERE domain = ?", (domain,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            self.conn.execute("UPDATE ct_results SET last_used = ? WHERE domain = ?", (now, domain))
+            self.conn.commit()
+            return set(json.loads(row[0])), row[1], now - row[2] < self.ct_ttl
+
+    def put_ct(self, domain, names, max_cert_id):
+        with self._lock:
+            now = time.time()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ct_results (domain, names, max_cert_id, fetched_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (domain, json.dumps(sorted(names)), max_cert_id, now, now),
+            )
+            self._evict("ct_results", self.max_ct_entries)
+            self.conn.commit()
+
+    # ---- DNS ----
+
+    def get_dns(self, name):
+        """Cached addresses (None for a cached negative answer), or MISS"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT addresses, expires_at FROM dns_answers WHERE name = ?", (name,)
+            ).fetchone()
+            if row is None or row[1] < time.time():
+                self.misses += 1
+                return MISS
+            self.hits += 1
+            self._touched.add(name)
+            return json.loads(row[0]) if row[0] is not None else None
+
+    def put_dns(self, name, addresses, ttl=None):
+        """Buffer an answer; `addresses` None records a negative answer"""
+        with self._lock:
+            if addresses:
+                ttl = min(DNS_MAX_TTL, max(DNS_MIN_TTL, ttl or DNS_MIN_TTL))
+            else:
+                ttl = DNS_NEGATIVE_TTL
+            now = time.time()
+            self._pending.append((name, json.dumps(addresses) if addresses else None, now + ttl, now))
+            if len(self._pending) >= FLUSH_EVERY:
+                self.flush()
+
+    def flush(self, evict=False):
+        with self._lock:
+            now = time.time()
+            self._flushes += 1
+            with self.conn:
+                if self._pending:
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO dns_answers (name, addresses, expires_at, last_used) "
+                        "VALUES (?, ?, ?, ?)",
+                        self._pending,
+                    )
+                    self._dns_rows += len(self._pending)
+                    self._pending = []
+                if self._touched:
+                    self.conn.executemany(
+                        "UPDATE dns_answers SET last_used = ? WHERE name = ?",
+                        ((now, name) for name in self._touched),
+                    )
+                    self._touched = set()
+                if evict or self._flushes % EVICT_EVERY == 0 or self._dns_rows > self.max_dns_entries:
+                    self._evict_dns(now)
+
+    def _evict_dns(self, now):
+        """Drop expired answers, then recount and trim only if still over the cap"""
+        expired = self.conn.execute("DELETE FROM dns_answers WHERE expires_at < ?", (now,)).rowcount
+        self._dns_rows = max(0, self._dns_rows - expired)
+        if self._dns_rows > self.max_dns_entries:
+            self._dns_rows = self._evict("dns_answers", self.max_dns_entries)
+
+    def _evict(self, table, limit):
+        """Drop the least recently used rows beyond `limit`; return the rows left"""
+        count = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if count > limit:
+            self.conn.execute(
+                f"DELETE FROM {table} WHERE rowid IN "
+                f"(SELECT rowid FROM {table} ORDER BY last_used ASC LIMIT ?)",
+                (count - limit,),
+            )
+        return min(count, limit)
+
+    def close(self):
+        with self._lock:
+            self.flush(evict=True)
+            self.conn.close()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Response Cache - BreakingCID Platform
+Short-lived on-disk cache of baseline GET responses, shared by every scan
+the worker runs (each scan is its own process), so the page one scanner
+already fetched is not fetched again by the next. Entries expire after a
+few minutes and the least recently used go once the count or byte cap is
+reached. Only scanner_runtime.fetch_baseline uses it; requests carrying
+payloads never do.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+CACHE_PATH = os.getenv(
+    "RESPONSE_CACHE_PATH",
+    str(Path(__file__).resolve().parent.parent / "cache" / "responses.sqlite3"),
+)
+RESPONSE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "120"))  # seconds; 0 disables the cache
+MAX_ENTRIES = 5000
+MAX_BYTES = 64 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    encoding TEXT,
+    body BLOB NOT NULL,
+    complete INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used);
+CREATE INDEX IF NOT EXISTS responses_expires_at ON responses(expires_at);
+"""
+
+class CachedEntry:
+    def __init__(self, url, status, headers, encoding, body, complete):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.encoding = encoding
+        self.body = body
+        self.complete = complete  # False when the body was cut at a read limit
+
+    def covers(self, limit, stop=None):
+        """Whether the stored body answers a read of up to `limit` bytes"""
+        return self.complete or len(self.body) >= limit or (stop is not None and stop(self.body))
+
+class ResponseCache:
+    """Safe to share between threads; writes commit immediately"""
+
+    def __init__(self, path=CACHE_PATH, ttl=RESPONSE_TTL, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """The live entry for `key`, or None"""
+        with self._lock:
+            now = time.time()
+            row = self.conn.execute(
+                "SELECT url, status, headers, encoding, body, complete FROM responses "
+                "WHERE key = ? AND expires_at >= ?", (key, now)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            url, status, headers, encoding, body, complete = row
+            return CachedEntry(url, status, json.loads(headers), encoding, bytes(body), bool(complete))
+
+    def put(self, key, url, status, headers, encoding, body, complete):
+        with self._lock:
+            now = time.time()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, status, headers, encoding, body, complete, size, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status, json.dumps(headers), encoding, body, int(complete), len(body),
+                 now + self.ttl, now),
+            )
+            self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now):
+        """Drop expired rows, then the least recently used beyond either cap"""
+        self.conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+        count, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        excess_entries = count - self.max_entries
+        excess_bytes = size - self.max_bytes
+        doomed = []
+        for key, row_size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used ASC"):
+            if excess_entries <= 0 and excess_bytes <= 0:
+                break
+            doomed.append((key,))
+            excess_entries -= 1
+            excess_bytes -= row_size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
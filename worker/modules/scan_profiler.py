@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Scan Profiler - BreakingCID Platform
+Opt-in profiling for the scanner CLIs (--profile, or SCAN_PROFILE=1 in the
+worker's environment). A scan runs under cProfile, written as .pstats,
+while a sampling thread records every thread's stack into a .collapsed
+file that flamegraph.pl, speedscope or inferno read directly. The sampler
+sees the DNS and HTTP worker threads that cProfile does not.
+"""
+
+import os
+import sys
+import time
+import cProfile
+import threading
+from collections import Counter
+from pathlib import Path
+
+PROFILE_DIR = os.getenv(
+    "SCAN_PROFILE_DIR",
+    str(Path(__file__).resolve().parent.parent / "results" / "profiles"),
+)
+SAMPLE_INTERVAL = float(os.getenv("SCAN_PROFILE_INTERVAL", "0.005"))  # seconds between stack samples
+MAX_STACK_DEPTH = 128
+
+def profile_requested(argv=None):
+    if '--profile' in (sys.argv[1:] if argv is None else argv):
+        return True
+    return os.getenv("SCAN_PROFILE", "").lower() in ("1", "true", "yes")
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Counts the stacks of every other thread every `interval` seconds"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._switch_interval = None
+
+    def start(self):
+        # The sampler needs the GIL to look. With the default 5ms switch
+        # interval it mostly gets it when a busy thread makes its next
+        # syscall, and samples pile up there instead of where time is spent
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 10))
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self):
+        own = threading.get_ident()
+        labels = {}  # code object -> label, so each frame is formatted once
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = frame_label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(";".join(frame.replace(";", ":") for frame in stack) + f" {count}\n")
+
+class ScanProfiler:
+    """
+    Context manager around one scan. On exit writes
+    <dir>/<name>[-job<id>]-<timestamp>.pstats and .collapsed and sets
+    `artifacts` to their paths. SCAN_JOB_ID (set by the worker) ties the
+    files to a job.
+    """
+
+    def __init__(self, name, directory=PROFILE_DIR, interval=SAMPLE_INTERVAL):
+        self.name = name
+        self.directory = Path(directory)
+        self.interval = interval
+        self.artifacts = None
+        self._profile = None
+        self._sampler = None
+        self._started = None
+
+    def _base_path(self):
+        job_id = os.getenv("SCAN_JOB_ID")
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        label = f"{self.name}-job{job_id}" if job_id else f"{self.name}-{os.getpid()}"
+        return self.directory / f"{label}-{stamp}"
+
+    def __enter__(self):
+        self._sampler = StackSampler(self.interval)
+        self._sampler.start()
+        self._profile = cProfile.Profile()
+        self._started = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self._profile.disable()
+        elapsed = time.perf_counter() - self._started
+        self._sampler.stop()
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            base = self._base_path()
+            pstats_path, collapsed_path = f"{base}.pstats", f"{base}.collapsed"
+            self._profile.dump_stats(pstats_path)
+            self._sampler.write_collapsed(collapsed_path)
+        except OSError as e:
+            print(f"[!] Could not write profile: {e}", file=sys.stderr)
+            return False
+        self.artifacts = {
+            "pstats": pstats_path,
+            "collapsed": collapsed_path,
+            "seconds": round(elapsed, 3),
+            "samples": self._sampler.samples,
+        }
+        print(f"[*] Profile written: {pstats_path} (cProfile), {collapsed_path} "
+              f"({self._sampler.samples} stack samples)", file=sys.stderr)
+        return False
+
+class _NoProfile:
+    artifacts = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def profiling(name, argv=None):
+    """A ScanProfiler when profiling was requested, otherwise a no-op context"""
+    return ScanProfiler(name) if profile_requested(argv) else _NoProfile()
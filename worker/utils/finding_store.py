@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Finding Store Utility
+Compact, deduplicating storage for vulnerability findings
+"""
+
+from typing import Dict, Iterator, Optional, Tuple
+
+# Fields whose values repeat across findings and go through the string table;
+# per-finding text (titles, payloads, evidence) is stored as-is
+SHARED_FIELDS = frozenset(("type", "name", "severity", "impact", "remediation", "cvss", "parameter", "method"))
+
+class Finding:
+    """
+    One finding as a shared key layout plus a tuple of values. Keys and
+    repeated values come from the store's tables, so the same remediation
+    text on every subdomain finding is held once.
+    """
+    __slots__ = ("layout", "values")
+    
+    def __init__(self, layout: Tuple[str, ...], values: tuple):
+        self.layout = layout
+        self.values = values
+    
+    def get(self, key: str, default=None):
+        try:
+            return self.values[self.layout.index(key)]
+        except ValueError:
+            return default
+    
+    def to_dict(self) -> Dict:
+        return dict(zip(self.layout, self.values))
+
+class FindingStore:
+    """
+    Findings deduplicated on (type, location, payload, sink, target) and
+    exported as the same dicts they were added as. Dedup keys are kept as
+    64-bit hashes; a collision would merge two distinct findings, which is
+    vanishingly rare. Strings are interned through a per-store table rather
+    than sys.intern so they are freed with the store.
+    """
+    
+    def __init__(self, keep_findings: bool = True):
+        # keep_findings=False only remembers dedup keys (for streamed reports)
+        self.keep_findings = keep_findings
+        self._findings = []
+        self._keys = set()  # hashes of dedup keys
+        self._strings: Dict[str, str] = {}
+        self._layouts: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self.duplicates = 0
+    
+    def _intern(self, value):
+        if isinstance(value, str):
+            return self._strings.setdefault(value, value)
+        return value
+    
+    @staticmethod
+    def dedup_key(vuln: Dict) -> Tuple:
+        """
+        Scanner findings use type/url/payload; report findings use
+        name/location. The DOM XSS sink and the target of a multi-target
+        scan tell apart findings that otherwise match (None when absent).
+        """
+        return (
+            vuln.get("type") or vuln.get("name"),
+            vuln.get("location") or vuln.get("url"),
+            vuln.get("payload"),
+            vuln.get("sink"),
+            vuln.get("target"),
+        )
+    
+    def add(self, vuln: Dict) -> Optional[Finding]:
+        """Store `vuln`; return None when an equal finding is already stored"""
+        key = self.dedup_key(vuln)
+        try:
+            key = hash(key)
+        except TypeError:
+            key = hash(repr(key))
+        if key in self._keys:
+            self.duplicates += 1
+            return None
+        self._keys.add(key)
+        layout = tuple(vuln)
+        layout = self._layouts.setdefault(layout, tuple(self._intern(k) for k in layout))
+        values = tuple(
+            self._intern(value) if name in SHARED_FIELDS else value
+            for name, value in zip(layout, vuln.values())
+        )
+        finding = Finding(layout, values)
+        if self.keep_findings:
+            self._findings.append(finding)
+        return finding
+    
+    def __len__(self) -> int:
+        return len(self._findings)
+    
+    def __iter__(self) -> Iterator[Dict]:
+        return (finding.to_dict() for finding in self._findings)
+    
+    def __bool__(self) -> bool:
+        return bool(self._findings)
+    
+    def findings(self) -> Iterator[Finding]:
+        return iter(self._findings)
+    
+    def to_list(self):
+        return [finding.to_dict() for finding in self._findings]
@@ -3,92 +3,16 @@
 Report Generator Utility
 """
 
+import io
 import json
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, TextIO
+from finding_store import FindingStore
 
-class ReportGenerator:
-    def __init__(self, target: str, scan_type: str):
-        self.target = target
-        self.scan_type = scan_type
-        self.start_time = datetime.now()
-        self.vulnerabilities = []
-    
-    def add_vulnerability(self, vuln: Dict):
-        """Add vulnerability to report"""
-        self.vulnerabilities.append(vuln)
-    
-    def generate_markdown(self) -> str:
-        """Generate markdown report"""
-        end_time = datetime.now()
-        duration = (end_time - self.start_time).total_seconds()
-        
-        # Count by severity
-        severity_counts = {
-            "critical": 0,
-            "high": 0,
-            "medium": 0,
-            "low": 0,
-            "info": 0
-        }
-        
-        for vuln in self.vulnerabilities:
-            severity = vuln.get("severity", "info").lower()
-            if severity in severity_counts:
-                severity_counts[severity] += 1
-        
-        # Calculate risk score
-        risk_score = (
-            severity_counts["critical"] * 10 +
-            severity_counts["high"] * 7 +
-            severity_counts["medium"] * 4 +
-            severity_counts["low"] * 2 +
-            severity_counts["info"] * 1
-        ) / 10
-        risk_score = min(risk_score, 10.0)
-        
-        report = f"""# Security Assessment Report
-
-## Executive Summary
-- **Target**: {self.target}
-- **Scan Type**: {self.scan_type}
-- **Date**: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}
-- **Duration**: {duration:.2f} seconds
-- **Total Vulnerabilities**: {len(self.vulnerabilities)}
-- **Risk Score**: {risk_score:.1f}/10
-
-## Vulnerability Summary
-- 🔴 Critical: {severity_counts['critical']}
-- 🟣 High: {severity_counts['high']}
-- 🟡 Medium: {severity_counts['medium']}
-- 🔵 Low: {severity_counts['low']}
-- ⚪ Info: {severity_counts['info']}
+SEVERITIES = ("critical", "high", "medium", "low", "info")
+SEVERITY_WEIGHTS = {"critical": 10, "high": 7, "medium": 4, "low": 2, "info": 1}
 
-## Technical Findings
-
-"""
-        
-        # Add vulnerabilities
-        for i, vuln in enumerate(self.vulnerabilities, 1):
-            severity = vuln.get("severity", "info").upper()
-            location = vuln.get("location", "N/A")
-            impact = vuln.get("impact", "N/A")
-            remediation = vuln.get("remediation", "N/A")
-            evidence = vuln.get("evidence", "N/A")
-            
-            report += f"""### {i}. {vuln.get('name', 'Unknown Vulnerability')}
-- **Severity**: {severity}
-- **Location**: {location}
-- **Impact**: {impact}
-- **Remediation**: {remediation}
-- **Evidence**: 
-```
-{evidence}
-```
-
-"""
-        
-        report += f"""## Recommendations
+RECOMMENDATIONS = """## Recommendations
 
 1. **Immediate Actions**:
    - Address all Critical and High severity vulnerabilities
@@ -105,41 +29,188 @@ class ReportGenerator:
    - Regular penetration testing
    - Security awareness training
 
----
-*Report generated by BreakingCID Platform*
-*Timestamp: {end_time.strftime('%Y-%m-%d %H:%M:%S')}*
 """
+
+class ReportWriter:
+    """
+    Writes a report to a text stream one finding at a time. In markdown the
+    executive summary goes first when the findings are already known
+    (`summary_first`), otherwise after the findings once the counts are final.
+    """
+    
+    def __init__(self, report: "ReportGenerator", stream: TextIO, format: str = "markdown",
+                 summary_first: bool = False):
+        if format not in ("markdown", "json"):
+            raise ValueError(f"Unsupported format: {format}")
+        self.report = report
+        self.stream = stream
+        self.format = format
+        self.summary_first = summary_first
+        self.written = 0
+        self.closed = False
+        self._write_header()
+    
+    def _write_header(self):
+        report = self.report
+        if self.format == "json":
+            self.stream.write("{\n")
+            for key, value in (("target", report.target), ("scan_type", report.scan_type),
+                               ("start_time", report.start_time.isoformat())):
+                self.stream.write(f"  {json.dumps(key)}: {json.dumps(value)},\n")
+            self.stream.write('  "vulnerabilities": [')
+            return
+        self.stream.write("# Security Assessment Report\n\n")
+        if self.summary_first:
+            self._write_summary(datetime.now())
+        self.stream.write("## Technical Findings\n\n")
+    
+    def _write_summary(self, end_time: datetime):
+        report = self.report
+        counts = report.severity_counts
+        duration = (end_time - report.start_time).total_seconds()
+        self.stream.write(f"""## Executive Summary
+- **Target**: {report.target}
+- **Scan Type**: {report.scan_type}
+- **Date**: {report.start_time.strftime('%Y-%m-%d %H:%M:%S')}
+- **Duration**: {duration:.2f} seconds
+- **Total Vulnerabilities**: {report.total}
+- **Risk Score**: {report.risk_score():.1f}/10
+
+## Vulnerability Summary
+- 🔴 Critical: {counts['critical']}
+- 🟣 High: {counts['high']}
+- 🟡 Medium: {counts['medium']}
+- 🔵 Low: {counts['low']}
+- ⚪ Info: {counts['info']}
+
+""")
+    
+    def write(self, vuln: Dict):
+        """Emit one finding"""
+        self.written += 1
+        if self.format == "json":
+            item = json.dumps(vuln, indent=2).replace("\n", "\n    ")
+            self.stream.write(("," if self.written > 1 else "") + "\n    " + item)
+            return
+        severity = vuln.get("severity", "info").upper()
+        location = vuln.get("location", "N/A")
+        impact = vuln.get("impact", "N/A")
+        remediation = vuln.get("remediation", "N/A")
+        evidence = vuln.get("evidence", "N/A")
         
-        return report
+        self.stream.write(f"""### {self.written}. {vuln.get('name', 'Unknown Vulnerability')}
+- **Severity**: {severity}
+- **Location**: {location}
+- **Impact**: {impact}
+- **Remediation**: {remediation}
+- **Evidence**: 
+```
+{evidence}
+```
+
+""")
+    
+    def close(self):
+        """Write the closing sections; the stream itself is left open"""
+        if self.closed:
+            return
+        self.closed = True
+        report = self.report
+        end_time = datetime.now()
+        if self.format == "json":
+            tail = {
+                "end_time": end_time.isoformat(),
+                "duration_seconds": (end_time - report.start_time).total_seconds(),
+                "total_vulnerabilities": report.total,
+                "severity_counts": report.severity_counts,
+            }
+            self.stream.write(("\n  ]" if self.written else "]"))
+            for key, value in tail.items():
+                self.stream.write(f",\n  {json.dumps(key)}: {json.dumps(value)}")
+            self.stream.write("\n}\n")
+        else:
+            if not self.summary_first:
+                self._write_summary(end_time)
+            self.stream.write(RECOMMENDATIONS)
+            self.stream.write(f"""---
+*Report generated by BreakingCID Platform*
+*Timestamp: {end_time.strftime('%Y-%m-%d %H:%M:%S')}*
+""")
+        self.stream.flush()
+
+class ReportGenerator:
+    def __init__(self, target: str, scan_type: str, retain: bool = True):
+        self.target = target
+        self.scan_type = scan_type
+        self.start_time = datetime.now()
+        # With retain=False findings only go to attached writers (only their
+        # dedup keys are kept), so memory stays flat however many are added
+        self.retain = retain
+        self.vulnerabilities = FindingStore(keep_findings=retain)
+        self.severity_counts = {severity: 0 for severity in SEVERITIES}
+        self.total = 0
+        self.writers: List[ReportWriter] = []
+    
+    def add_vulnerability(self, vuln: Dict) -> bool:
+        """Add vulnerability to report; returns False for a duplicate"""
+        if self.vulnerabilities.add(vuln) is None:
+            return False
+        severity = vuln.get("severity", "info").lower()
+        if severity in self.severity_counts:
+            self.severity_counts[severity] += 1
+        self.total += 1
+        for writer in self.writers:
+            writer.write(vuln)
+        return True
+    
+    def risk_score(self) -> float:
+        score = sum(self.severity_counts[s] * SEVERITY_WEIGHTS[s] for s in SEVERITIES) / 10
+        return min(score, 10.0)
+    
+    def attach(self, stream: TextIO, format: str = "markdown") -> ReportWriter:
+        """
+        Stream the report to `stream` (a file, or a socket's makefile('w'))
+        as findings are added. Findings already retained are written first.
+        Call finish() to write the closing sections.
+        """
+        writer = ReportWriter(self, stream, format)
+        for vuln in self.vulnerabilities:
+            writer.write(vuln)
+        self.writers.append(writer)
+        return writer
+    
+    def finish(self):
+        """Close every attached writer"""
+        for writer in self.writers:
+            writer.close()
+        self.writers = []
+    
+    def write_report(self, stream: TextIO, format: str = "markdown"):
+        """Write the complete report for the retained findings to `stream`"""
+        writer = ReportWriter(self, stream, format, summary_first=True)
+        for vuln in self.vulnerabilities:
+            writer.write(vuln)
+        writer.close()
+    
+    def generate_markdown(self) -> str:
+        """Generate markdown report"""
+        buf = io.StringIO()
+        self.write_report(buf, "markdown")
+        return buf.getvalue()
     
     def generate_json(self) -> str:
         """Generate JSON report"""
-        end_time = datetime.now()
-        duration = (end_time - self.start_time).total_seconds()
-        
-        report = {
-            "target": self.target,
-            "scan_type": self.scan_type,
-            "start_time": self.start_time.isoformat(),
-            "end_time": end_time.isoformat(),
-            "duration_seconds": duration,
-            "total_vulnerabilities": len(self.vulnerabilities),
-            "vulnerabilities": self.vulnerabilities
-        }
-        
-        return json.dumps(report, indent=2)
+        buf = io.StringIO()
+        self.write_report(buf, "json")
+        return buf.getvalue()
     
     def save_report(self, output_path: str, format: str = "markdown"):
         """Save report to file"""
-        if format == "markdown":
-            content = self.generate_markdown()
-        elif format == "json":
-            content = self.generate_json()
-        else:
+        if format not in ("markdown", "json"):
             raise ValueError(f"Unsupported format: {format}")
         
         with open(output_path, 'w') as f:
-            f.write(content)
+            self.write_report(f, format)
         
         return output_path
 
@@ -8,19 +8,144 @@ import os
 import sys
 import time
 import json
+import shutil
+import hashlib
+import threading
+import importlib.util
 import requests
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+import worker_metrics
+from worker_metrics import (backend_errors_total, backend_request_seconds, job_duration_seconds, jobs_in_flight,
+                            jobs_total, last_poll_timestamp, log_backlog, queue_wait_seconds)
 
 # Configuração
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:3000")
 WORKER_API_KEY = os.getenv("WORKER_API_KEY", "default-worker-key-change-in-production")
 WORKER_ID = os.getenv("WORKER_ID", f"worker-{os.uname().nodename}")
 POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "5"))  # segundos
+# Scans simultâneos; o padrão acompanha o hardware (os scans esperam mais rede que CPU)
+MAX_CONCURRENT_SCANS = int(os.getenv("MAX_CONCURRENT_SCANS", str(max(1, (os.cpu_count() or 1) // 2))))
 
 # Diretório dos scripts
 SCRIPTS_DIR = Path(__file__).parent / "scripts"
+MODULES_DIR = Path(__file__).parent / "modules"
+
+def module_version():
+    """
+    Hash do código dos scanners (scripts/ e modules/). O backend só reaproveita
+    o resultado de um scan idêntico feito com a mesma versão
+    """
+    digest = hashlib.sha256()
+    for directory in (SCRIPTS_DIR, MODULES_DIR):
+        for path in sorted(directory.glob("*")):
+            if path.suffix in (".py", ".sh") and path.is_file():
+                digest.update(path.name.encode() + b"\0" + path.read_bytes())
+    return digest.hexdigest()[:16]
+
+MODULE_VERSION = module_version()
+
+# Implementações de cada tipo de scan, na ordem de preferência: script e o
+# que ele precisa (módulos Python e executáveis no PATH)
+SCANNERS = {
+    "http_smuggling": [("http_smuggling.py", ("requests",), ())],
+    "ssrf": [("ssrf_scanner.py", ("requests",), ())],
+    "xss": [("xss_scanner.py", ("requests", "bs4"), ())],
+    # O .py (resolvers assíncronos, wildcard, cache, pipeline) é o scanner
+    # atual; o .sh só roda quando falta requests/dnspython
+    "subdomain_enum": [
+        ("subdomain_enum.py", ("requests", "dns"), ()),
+        ("subdomain_enum.sh", (), ("bash", "curl", "jq", "host")),
+    ],
+}
+
+def find_script(name):
+    """scripts/ primeiro, depois modules/ (onde ficam os scanners Python no repositório)"""
+    for directory in (SCRIPTS_DIR, MODULES_DIR):
+        if (directory / name).is_file():
+            return directory / name
+    return None
+
+def missing_requirements(script, modules, executables):
+    """O que falta neste host para rodar o script (vazio = pode rodar)"""
+    missing = [] if find_script(script) else [script]
+    missing += [module for module in modules if importlib.util.find_spec(module) is None]
+    missing += [executable for executable in executables if shutil.which(executable) is None]
+    return missing
+
+def detect_capabilities():
+    """
+    Script escolhido para cada tipo de scan que este worker consegue rodar e,
+    para os outros, o que falta na implementação preferida
+    """
+    scripts, missing = {}, {}
+    for scan_type, implementations in SCANNERS.items():
+        for script, modules, executables in implementations:
+            if not missing_requirements(script, modules, executables):
+                scripts[scan_type] = find_script(script)
+                break
+        else:
+            missing[scan_type] = missing_requirements(*implementations[0])
+    return scripts, missing
+
+def host_load():
+    """Load average de 1 minuto por CPU (None onde não existe)"""
+    try:
+        return round(os.getloadavg()[0] / (os.cpu_count() or 1), 2)
+    except (AttributeError, OSError):
+        return None
+
+def peak_rss_mb():
+    """Pico de memória deste processo (None onde resource não existe)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB no Linux, bytes no macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+class JobTelemetry:
+    """
+    Telemetria do worker para um job: tempo por fase (execução do script,
+    parse, envio de logs), contadores de upload e a telemetria que o próprio
+    scanner reporta no resultado. Vai junto com os resultados do job.
+    """
+    
+    def __init__(self):
+        self.phases = {}
+        self.log_posts = 0
+        self.log_failures = 0
+        self.stdout_bytes = 0
+        self.scanner = None
+        self.profile = None  # caminhos dos artefatos quando SCAN_PROFILE=1
+        
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(self.phases.get(name, 0.0) + time.perf_counter() - started, 3)
+            
+    def to_dict(self, payload_bytes=0):
+        return {
+            "scanner": self.scanner,
+            "profile": self.profile,
+            "worker": {
+                "workerId": WORKER_ID,
+                "phases": self.phases,
+                "logPosts": self.log_posts,
+                "logFailures": self.log_failures,
+                "stdoutBytes": self.stdout_bytes,
+                "payloadBytes": payload_bytes,
+                "peakRssMb": peak_rss_mb(),
+                "sentAt": int(time.time() * 1000),
+            },
+        }
 
 class WorkerClient:
     def __init__(self):
@@ -28,6 +153,35 @@ class WorkerClient:
             "X-Worker-API-Key": WORKER_API_KEY,
             "Content-Type": "application/json"
         }
+        self._local = threading.local()  # JobTelemetry do job de cada thread
+        self._running_lock = threading.Lock()
+        self.running = 0
+        self.scripts, self.missing = detect_capabilities()
+        self.capabilities = list(self.scripts)
+        if len(self.scripts) == len(SCANNERS):
+            self.capabilities.append("comprehensive")
+        
+    @property
+    def telemetry(self):
+        return getattr(self._local, "telemetry", None)
+        
+    @telemetry.setter
+    def telemetry(self, value):
+        self._local.telemetry = value
+        
+    def backend_request(self, endpoint, method, url, **kwargs):
+        """Chamada ao backend com latência e falhas contabilizadas em worker_metrics"""
+        started = time.perf_counter()
+        try:
+            response = requests.request(method, url, headers=self.headers, **kwargs)
+        except Exception:
+            backend_errors_total.inc(endpoint=endpoint)
+            raise
+        finally:
+            backend_request_seconds.observe(time.perf_counter() - started, endpoint=endpoint)
+        if response.status_code != 200:
+            backend_errors_total.inc(endpoint=endpoint)
+        return response
         
     def log(self, message):
         """Log com timestamp"""
@@ -36,29 +190,51 @@ class WorkerClient:
         
     def send_log(self, job_id, message):
         """Envia log em tempo real para o backend"""
+        telemetry = self.telemetry
+        started = time.perf_counter()
         try:
-            requests.post(
+            self.backend_request(
+                "logs", "POST",
                 f"{BACKEND_URL}/api/worker/jobs/{job_id}/logs",
-                headers=self.headers,
                 json={"message": message},
                 timeout=5
             )
         except Exception as e:
             self.log(f"Failed to send log: {e}")
+            if telemetry:
+                telemetry.log_failures += 1
+        if telemetry:
+            telemetry.log_posts += 1
+            telemetry.phases["log_upload"] = round(
+                telemetry.phases.get("log_upload", 0.0) + time.perf_counter() - started, 3)
             
     def fetch_pending_job(self):
         """Busca próximo job pendente"""
         try:
-            response = requests.get(
+            last_poll_timestamp.set(time.time())
+            response = self.backend_request(
+                "pending", "GET",
                 f"{BACKEND_URL}/api/worker/jobs/pending",
-                headers=self.headers,
-                params={"workerId": WORKER_ID},
+                # Capacidades e carga: o backend só manda jobs que este worker
+                # consegue rodar, e prefere o worker menos carregado
+                params={
+                    "workerId": WORKER_ID,
+                    "moduleVersion": MODULE_VERSION,
+                    "capabilities": ",".join(self.capabilities),
+                    "maxConcurrency": MAX_CONCURRENT_SCANS,
+                    "running": self.running,
+                    "cpus": os.cpu_count(),
+                    "load": host_load(),
+                },
                 timeout=10
             )
             
             if response.status_code == 200:
                 data = response.json()
-                return data.get("job")
+                job = data.get("job")
+                if job:
+                    self.record_queue_wait(job)
+                return job
             else:
                 self.log(f"Error fetching job: {response.status_code}")
                 return None
@@ -66,11 +242,25 @@ class WorkerClient:
             self.log(f"Failed to fetch job: {e}")
             return None
             
+    def record_queue_wait(self, job):
+        """Tempo entre a criação do job e o pickup (relógios do backend e do worker)"""
+        created_at = job.get("createdAt")
+        if not created_at:
+            return
+        try:
+            created = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        except ValueError:
+            return
+        queue_wait_seconds.observe(max(0.0, time.time() - created.timestamp()))
+        
     def execute_scan(self, job):
         """Executa scan baseado no tipo"""
         job_id = job["id"]
         scan_type = job["scanType"]
         target = job["target"]
+        self.telemetry = telemetry = JobTelemetry()
+        jobs_in_flight.inc()
+        status = "failed"
         
         self.log(f"[Job {job_id}] Starting {scan_type} scan on {target}")
         self.send_log(job_id, f"[*] Worker {WORKER_ID} picked up job")
@@ -81,61 +271,80 @@ class WorkerClient:
         
         try:
             # Selecionar script apropriado
-            if scan_type == "http_smuggling":
-                script = SCRIPTS_DIR / "http_smuggling.py"
-            elif scan_type == "ssrf":
-                script = SCRIPTS_DIR / "ssrf_scanner.py"
-            elif scan_type == "xss":
-                script = SCRIPTS_DIR / "xss_scanner.py"
-            elif scan_type == "subdomain_enum":
-                script = SCRIPTS_DIR / "subdomain_enum.sh"
-            elif scan_type == "comprehensive":
-                return self.execute_comprehensive(job)
-            else:
+            if scan_type == "comprehensive":
+                self.execute_comprehensive(job)
+                status = "completed"
+                return
+            if scan_type not in SCANNERS:
                 raise ValueError(f"Unknown scan type: {scan_type}")
+            if scan_type not in self.scripts:
+                raise RuntimeError(f"{scan_type} unavailable on this worker, missing: {', '.join(self.missing[scan_type])}")
+            script = self.scripts[scan_type]
                 
             # Executar script
             self.send_log(job_id, f"[*] Executing {script.name}...")
             
-            if script.suffix == ".sh":
-                result = subprocess.run(
-                    ["bash", str(script), target],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
-                )
-            else:
-                result = subprocess.run(
-                    ["python3", str(script), target],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
-                )
+            # SCAN_JOB_ID nomeia os artefatos de profiling (SCAN_PROFILE=1)
+            env = dict(os.environ, SCAN_JOB_ID=str(job_id))
+            with telemetry.phase("execute"):
+                if script.suffix == ".sh":
+                    result = subprocess.run(
+                        ["bash", str(script), target],
+                        capture_output=True,
+                        text=True,
+                        timeout=300,
+                        env=env
+                    )
+                else:
+                    result = subprocess.run(
+                        [sys.executable, str(script), target],
+                        capture_output=True,
+                        text=True,
+                        timeout=300,
+                        env=env
+                    )
+            telemetry.stdout_bytes = len(result.stdout or "")
                 
             # Capturar logs do stderr
             if result.stderr:
-                for line in result.stderr.split("\n"):
-                    if line.strip():
-                        self.send_log(job_id, line.strip())
+                lines = [line.strip() for line in result.stderr.split("\n") if line.strip()]
+                log_backlog.inc(len(lines))
+                for line in lines:
+                    self.send_log(job_id, line)
+                    log_backlog.dec()
                         
             # Parse resultado
             if result.returncode == 0 and result.stdout:
-                scan_result = json.loads(result.stdout)
+                with telemetry.phase("parse"):
+                    scan_result = json.loads(result.stdout)
+                telemetry.scanner = scan_result.pop("telemetry", None)
+                telemetry.profile = scan_result.pop("profile", None)
+                if telemetry.profile:
+                    self.send_log(job_id, f"[*] Profile: {telemetry.profile['pstats']} (pstats), "
+                                          f"{telemetry.profile['collapsed']} (collapsed stacks)")
+                worker_metrics.record_scanner(scan_type, telemetry.scanner)
                 duration = int(time.time() - start_time)
                 
                 self.send_log(job_id, f"[+] Scan completed in {duration}s")
                 self.send_results(job_id, scan_result, duration)
+                status = "completed"
             else:
                 raise Exception(f"Script failed: {result.stderr}")
                 
         except Exception as e:
             self.log(f"[Job {job_id}] Error: {e}")
             self.send_error(job_id, str(e))
+        finally:
+            self.telemetry = None
+            jobs_in_flight.dec()
+            jobs_total.inc(scan_type=scan_type, status=status)
+            job_duration_seconds.observe(time.time() - start_time, scan_type=scan_type)
             
     def execute_comprehensive(self, job):
         """Executa todos os scans"""
         job_id = job["id"]
         target = job["target"]
+        self.telemetry = self.telemetry or JobTelemetry()
         
         self.send_log(job_id, "[*] Starting comprehensive scan...")
         
@@ -171,17 +380,21 @@ class WorkerClient:
         self.send_results(job_id, result, duration)
         
     def send_results(self, job_id, result, duration):
-        """Envia resultados finais"""
+        """Envia resultados finais, com a telemetria do job"""
         try:
-            response = requests.post(
+            payload = {
+                "status": "completed",
+                "vulnerabilities": result.get("vulnerabilities", []),
+                "report": result.get("report"),
+                "duration": duration
+            }
+            if self.telemetry:
+                # Tamanho aproximado: o corpo sem a própria telemetria
+                payload["telemetry"] = self.telemetry.to_dict(len(json.dumps(payload, default=str)))
+            response = self.backend_request(
+                "results", "POST",
                 f"{BACKEND_URL}/api/worker/jobs/{job_id}/results",
-                headers=self.headers,
-                json={
-                    "status": "completed",
-                    "vulnerabilities": result.get("vulnerabilities", []),
-                    "report": result.get("report"),
-                    "duration": duration
-                },
+                json=payload,
                 timeout=30
             )
             
@@ -195,9 +408,9 @@ class WorkerClient:
     def send_error(self, job_id, error):
         """Reporta erro na execução"""
         try:
-            requests.post(
+            self.backend_request(
+                "error", "POST",
                 f"{BACKEND_URL}/api/worker/jobs/{job_id}/error",
-                headers=self.headers,
                 json={"error": error},
                 timeout=10
             )
@@ -209,23 +422,50 @@ class WorkerClient:
         self.log(f"Worker {WORKER_ID} started")
         self.log(f"Backend: {BACKEND_URL}")
         self.log(f"Poll interval: {POLL_INTERVAL}s")
+        self.log(f"Module version: {MODULE_VERSION}")
+        self.log(f"Capabilities: {', '.join(self.capabilities) or 'none'} (max {MAX_CONCURRENT_SCANS} concurrent scans)")
+        for scan_type, needs in self.missing.items():
+            self.log(f"Not running {scan_type}: missing {', '.join(needs)}")
+        try:
+            if worker_metrics.start_metrics_server():
+                self.log(f"Metrics: http://{worker_metrics.METRICS_ADDR}:{worker_metrics.METRICS_PORT}/metrics")
+        except OSError as e:
+            self.log(f"Metrics endpoint disabled: {e}")
         
-        while True:
-            try:
-                job = self.fetch_pending_job()
-                
-                if job:
-                    self.execute_scan(job)
-                else:
-                    # Sem jobs, aguardar
+        # Um slot por scan simultâneo; só faz polling com slot livre
+        slots = threading.Semaphore(MAX_CONCURRENT_SCANS)
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SCANS, thread_name_prefix="scan") as pool:
+            while True:
+                try:
+                    slots.acquire()
+                    job = self.fetch_pending_job()
+                    
+                    if job:
+                        with self._running_lock:
+                            self.running += 1
+                        pool.submit(self.run_job, job, slots)
+                    else:
+                        # Sem jobs, aguardar
+                        slots.release()
+                        time.sleep(POLL_INTERVAL)
+                        
+                except KeyboardInterrupt:
+                    self.log("Worker stopped by user, waiting for running scans")
+                    break
+                except Exception as e:
+                    self.log(f"Unexpected error: {e}")
                     time.sleep(POLL_INTERVAL)
                     
-            except KeyboardInterrupt:
-                self.log("Worker stopped by user")
-                break
-            except Exception as e:
-                self.log(f"Unexpected error: {e}")
-                time.sleep(POLL_INTERVAL)
+    def run_job(self, job, slots):
+        """Executa um job numa thread do pool e libera o slot ao terminar"""
+        try:
+            self.execute_scan(job)
+        except Exception as e:
+            self.log(f"[Job {job.get('id')}] Unexpected error: {e}")
+        finally:
+            with self._running_lock:
+                self.running -= 1
+            slots.release()
 
 if __name__ == "__main__":
     worker = WorkerClient()
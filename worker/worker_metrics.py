@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+BreakingCID Worker Metrics
+Métricas do worker no formato texto do Prometheus, servidas em
+http://METRICS_ADDR:METRICS_PORT/metrics. Só biblioteca padrão: contadores,
+gauges e histogramas com labels, atualizados sob um lock e renderizados
+apenas quando alguém faz scrape, então o custo por evento é de um dict.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_ADDR = os.getenv("METRICS_ADDR", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))  # 0 desliga o endpoint
+
+# Buckets em segundos
+JOB_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800)
+QUEUE_BUCKETS = (0.5, 1, 5, 15, 30, 60, 300, 900, 3600)
+API_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines += self._render_items(items)
+        return lines
+
+    def _render_items(self, items):
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=API_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Contagem por bucket (não cumulativa), soma, total
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_items(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, key, (("le", _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=API_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+jobs_in_flight = registry.gauge(
+    "breakingcid_worker_jobs_in_flight", "Jobs this worker is executing")
+jobs_total = registry.counter(
+    "breakingcid_worker_jobs_total", "Jobs finished, by scan type and outcome", ("scan_type", "status"))
+queue_wait_seconds = registry.histogram(
+    "breakingcid_worker_queue_wait_seconds", "Time from job creation to pickup by this worker",
+    buckets=QUEUE_BUCKETS)
+job_duration_seconds = registry.histogram(
+    "breakingcid_worker_job_duration_seconds", "Job wall time, by scan type", ("scan_type",), JOB_BUCKETS)
+backend_request_seconds = registry.histogram(
+    "breakingcid_worker_backend_request_seconds", "Backend API call latency", ("endpoint",))
+backend_errors_total = registry.counter(
+    "breakingcid_worker_backend_errors_total", "Backend API calls that failed or returned non-200", ("endpoint",))
+log_backlog = registry.gauge(
+    "breakingcid_worker_log_backlog", "Log lines captured but not yet shipped to the backend")
+scanner_requests_total = registry.counter(
+    "breakingcid_worker_scanner_requests_total", "Requests sent to targets by scanners, by scan type",
+    ("scan_type",))
+scanner_dns_queries_total = registry.counter(
+    "breakingcid_worker_scanner_dns_queries_total", "DNS queries made by scanners, by scan type", ("scan_type",))
+scanner_response_cache_hits_total = registry.counter(
+    "breakingcid_worker_scanner_response_cache_hits_total",
+    "Baseline GETs answered from the cross-scan response cache, by scan type", ("scan_type",))
+scanner_bytes_total = registry.counter(
+    "breakingcid_worker_scanner_bytes_total", "Bytes exchanged with targets by scanners", ("scan_type", "direction"))
+last_poll_timestamp = registry.gauge(
+    "breakingcid_worker_last_poll_timestamp_seconds", "Unix time of the last poll for pending jobs")
+
+# Gauges sem labels aparecem com 0 desde o primeiro scrape
+jobs_in_flight.set(0)
+log_backlog.set(0)
+
+def record_scanner(scan_type, telemetry):
+    """Soma a telemetria de um scan terminado (ver scanner_runtime.Metrics) aos contadores de throughput"""
+    if not telemetry:
+        return
+    scanner_requests_total.inc(telemetry.get("requests", 0), scan_type=scan_type)
+    scanner_dns_queries_total.inc(telemetry.get("dns_queries", 0), scan_type=scan_type)
+    scanner_response_cache_hits_total.inc(telemetry.get("response_cache_hits", 0), scan_type=scan_type)
+    scanner_bytes_total.inc(telemetry.get("bytes_read", 0), scan_type=scan_type, direction="in")
+    scanner_bytes_total.inc(telemetry.get("bytes_sent", 0), scan_type=scan_type, direction="out")
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_metrics_server(addr=METRICS_ADDR, port=METRICS_PORT, registry=registry):
+    """Serve /metrics em uma thread daemon; retorna o servidor ou None se desligado"""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server